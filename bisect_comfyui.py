@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Find the ComfyUI commit that broke a custom node.
+
+Binary-searches the first-parent history between a known good and a known bad
+ComfyUI commit, running main.py's install/boot/object_info pipeline for the
+node at each bisection point. The bad commit is tested first to learn how
+the node fails there. A point counts as good if the pipeline PASSED, as bad if
+it fails the same way, and is skipped (like `git bisect skip`) otherwise, e.g.
+if ComfyUI cannot be checked out, its venv cannot be built or an install fails
+for a transient reason.
+
+Each point gets its own node log (the cell id plus the short commit) and its
+own object_info manifest in a separate store, so nightly run diffs never see
+bisection snapshots.
+
+Rebuilding .venv with uv sync dominates each point, but most commits do not
+touch dependencies. The pipeline's environment cache (.ci_cache/envs, keyed on
+the lockfile and sync command) restores those by hardlinking instead.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import main as pipeline
+from matrix import DEFAULT_VERSION
+
+# Kept apart from the nightly store so `snapshots.py diff` only compares sweeps
+BISECT_STORE_DIR = os.path.abspath("./object_info_store_bisect")
+
+
+def bisect_commits(commits, test):
+    """
+    Binary-search the first bad commit.
+
+    Args:
+        commits: Commits after the good commit up to and including the bad one, oldest first
+        test: Callable(commit) returning "good", "bad" or "skip"
+
+    Returns:
+        tuple: (int or None, list) - (index of the first bad commit, indices it
+            could be); the index is None when skipped commits leave several candidates
+    """
+    good, bad = -1, len(commits) - 1
+    skipped = set()
+    while bad - good > 1:
+        middle = (good + bad) // 2
+        untested = sorted(
+            (i for i in range(good + 1, bad) if i not in skipped),
+            key=lambda i: (abs(i - middle), i)
+        )
+        if not untested:
+            break
+        index = untested[0]
+        verdict = test(commits[index])
+        if verdict == "good":
+            good = index
+        elif verdict == "bad":
+            bad = index
+        else:
+            skipped.add(index)
+    candidates = list(range(good + 1, bad + 1))
+    return (bad if len(candidates) == 1 else None), candidates
+
+
+def git(args, cwd):
+    """Run a git command in the ComfyUI checkout; returns (return_code, stdout, stderr)."""
+    return pipeline.run_cmd("git " + " ".join(args), cwd=cwd)
+
+
+def list_commits(comfy_dir, good, bad):
+    """
+    List the first-parent commits after good up to and including bad.
+
+    start.py clones a single branch with shallow history, so the history of
+    every branch is fetched first, and good or bad commits that are still
+    unknown (e.g. on no branch) are fetched by name.
+
+    Returns:
+        list: (sha, subject) tuples, oldest first
+
+    Raises:
+        RuntimeError: If the history cannot be fetched or listed
+    """
+    fetch = ["fetch", "--quiet", "origin", '"+refs/heads/*:refs/remotes/origin/*"']
+    if os.path.exists(os.path.join(comfy_dir, ".git", "shallow")):
+        fetch.insert(1, "--unshallow")
+    rc, _, err = git(fetch, comfy_dir)
+    if rc != 0:
+        raise RuntimeError(f"Cannot fetch the ComfyUI history: {err.strip()}")
+    for ref in (good, bad):
+        if git(["cat-file", "-e", f'"{ref}^{{commit}}"'], comfy_dir)[0] != 0:
+            rc, _, err = git(["fetch", "--quiet", "origin", ref], comfy_dir)
+            if rc != 0:
+                raise RuntimeError(f"Cannot fetch {ref}: {err.strip()}")
+    rc, out, err = git(
+        ["log", "--first-parent", "--ancestry-path", "--reverse", '--format="%H %s"', f"{good}..{bad}"], comfy_dir
+    )
+    if rc != 0:
+        raise RuntimeError(f"Cannot list commits {good}..{bad}: {err.strip()}")
+    return [tuple(line.split(" ", 1)) if " " in line else (line, "") for line in out.splitlines() if line]
+
+
+def current_ref(comfy_dir):
+    """Return the branch checked out in ComfyUI, or the commit if HEAD is detached."""
+    _, branch, _ = git(["rev-parse", "--abbrev-ref", "HEAD"], comfy_dir)
+    if branch.strip() and branch.strip() != "HEAD":
+        return branch.strip()
+    _, commit, _ = git(["rev-parse", "HEAD"], comfy_dir)
+    return commit.strip()
+
+
+def judge_outcome(final_outcome, bad_outcome):
+    """
+    Map a pipeline outcome to a bisection verdict.
+
+    Args:
+        final_outcome: Outcome at the tested commit, None if it could not be checked out
+        bad_outcome: Outcome observed at the known bad commit
+
+    Returns:
+        str: "good", "bad" or "skip"
+    """
+    if final_outcome == "PASSED":
+        return "good"
+    if final_outcome == bad_outcome and final_outcome not in (None, "FAILED_RESET_VENV"):
+        return "bad"
+    return "skip"
+
+
+def run_bisection_point(node_id, commit, subject, version, extra, bad_outcome=None):
+    """
+    Check out a ComfyUI commit and run the node pipeline against it.
+
+    Args:
+        bad_outcome: Outcome at the bad commit; None when testing the bad commit itself
+
+    Returns:
+        dict: The bisection point's verdict, outcome, environment and timings
+    """
+    point = {
+        "commit": commit,
+        "subject": subject,
+        "verdict": "skip",
+        "final_outcome": None,
+        "env_key": None,
+        "env_cache_hit": None,
+        "checkout_seconds": None,
+        "step_timings": {},
+        "total_seconds": None
+    }
+    start_time = time.time()
+    rc, _, err = git(["-c", "advice.detachedHead=false", "checkout", "--detach", "--quiet", commit], pipeline.COMFYUI_DIR)
+    point["checkout_seconds"] = time.time() - start_time
+    if rc != 0:
+        pipeline.log_error(f"Failed to check out {commit}: {err.strip()}")
+        point["total_seconds"] = time.time() - start_time
+        return point
+
+    result_data = pipeline.run_node_test(
+        node_id, version, extra, point_id=commit[:12], snapshot_store=BISECT_STORE_DIR
+    )
+    if result_data["env_cache"]:
+        point["env_key"] = result_data["env_cache"]["key"]
+        point["env_cache_hit"] = result_data["env_cache"]["cache_hit"]
+    point["final_outcome"] = result_data["final_outcome"]
+    point["step_timings"] = result_data["step_timings"]
+    point["total_seconds"] = time.time() - start_time
+    point["verdict"] = judge_outcome(result_data["final_outcome"], bad_outcome or result_data["final_outcome"])
+    return point
+
+
+def bisect_node(node_id, good, bad, version, extra):
+    """Bisect one node and write the report; returns the process exit code."""
+    comfy_dir = pipeline.COMFYUI_DIR
+    original_ref = current_ref(comfy_dir)
+    points = []
+    try:
+        try:
+            commits = list_commits(comfy_dir, good, bad)
+        except RuntimeError as e:
+            pipeline.log_error(str(e))
+            return 1
+        if not commits:
+            pipeline.log_error(f"No first-parent commits between {good} and {bad}")
+            return 1
+        subjects = dict(commits)
+
+        pipeline.log_separator("=")
+        bad_sha = commits[-1][0]
+        pipeline.log_colored(f"Testing the bad commit {bad_sha[:12]} {subjects[bad_sha]}", pipeline.Fore.CYAN)
+        bad_point = run_bisection_point(node_id, bad_sha, subjects[bad_sha], version, extra)
+        points.append(bad_point)
+        if bad_point["verdict"] != "bad":
+            pipeline.log_error(f"{node_id} does not fail at {bad} ({bad_point['final_outcome']}); nothing to bisect")
+            return 1
+        bad_outcome = bad_point["final_outcome"]
+        pipeline.logger.info(f"Bisecting {node_id} across {len(commits)} ComfyUI commits for {bad_outcome}")
+
+        def test(commit):
+            pipeline.log_separator("=")
+            pipeline.log_colored(f"Testing ComfyUI {commit[:12]} {subjects[commit]}", pipeline.Fore.CYAN)
+            point = run_bisection_point(node_id, commit, subjects[commit], version, extra, bad_outcome)
+            points.append(point)
+            pipeline.logger.info(f"{commit[:12]} is {point['verdict']} ({point['final_outcome']}, {point['total_seconds']:.0f}s)")
+            return point["verdict"]
+
+        first_bad, candidates = bisect_commits([sha for sha, _ in commits], test)
+    finally:
+        git(["-c", "advice.detachedHead=false", "checkout", "--quiet", original_ref], comfy_dir)
+
+    report = {
+        "node_id": node_id,
+        "good": good,
+        "bad": bad,
+        "version": version,
+        "extra": extra,
+        "bad_outcome": bad_outcome,
+        "first_bad_commit": commits[first_bad][0] if first_bad is not None else None,
+        "candidates": [commits[i][0] for i in candidates],
+        "points": points
+    }
+    timestamp = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    report_filename = f"comfyui_bisect_{node_id}_{timestamp}.json"
+    with open(report_filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    pipeline.log_separator("=")
+    if first_bad is not None:
+        sha, subject = commits[first_bad]
+        pipeline.log_colored(f"First bad commit: {sha} {subject}", pipeline.Fore.RED)
+    else:
+        pipeline.log_warning(f"First bad commit is one of {len(candidates)} commits that could not all be tested: "
+                             + ", ".join(commits[i][0][:12] for i in candidates))
+    for point in points:
+        timings = ", ".join(f"{step} {seconds:.1f}s" for step, seconds in point["step_timings"].items())
+        cache = "" if point["env_cache_hit"] is None else (" [env cached]" if point["env_cache_hit"] else " [env built]")
+        pipeline.logger.info(f"  {point['commit'][:12]} {point['verdict']:<4}{cache} checkout {point['checkout_seconds']:.1f}s"
+                             + (f", {timings}" if timings else ""))
+    pipeline.logger.info(f"Bisect report saved to {report_filename}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the ComfyUI commit that broke a custom node")
+    parser.add_argument("node_id", help="Custom node id as passed to cm-cli install")
+    parser.add_argument("--good", required=True, help="ComfyUI commit where the node passed")
+    parser.add_argument("--bad", required=True, help="ComfyUI commit where the node fails")
+    parser.add_argument("--version", default=DEFAULT_VERSION, help="Node version to install: latest, nightly or a pinned version")
+    parser.add_argument("--extra", default=pipeline.DEFAULT_TORCH_EXTRA, help="Torch extra to sync the venv with (e.g. cpu, cu126)")
+    args = parser.parse_args()
+
+    comfy_dir = pipeline.COMFYUI_DIR
+    if not os.path.exists(comfy_dir):
+        print(f"ComfyUI directory not found at {comfy_dir}", file=sys.stderr)
+        return 1
+
+    pipeline.setup_logging()
+    try:
+        return bisect_node(args.node_id, args.good, args.bad, args.version, args.extra)
+    finally:
+        pipeline.shutdown_logging()
+
+if __name__ == "__main__":
+    sys.exit(main())
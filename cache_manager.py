@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Disk usage accounting and LRU garbage collection for the CI working directory.
+
+Every sweep leaves artifacts behind: virtual environments, custom node
+checkouts, models that nodes download at import time, the uv cache and
+timestamped logs/results. This module discovers them, reports usage per
+artifact class and per node, and evicts the least recently used artifacts of
+a class until it fits its budget. Paths the current run needs are passed in as
+protected and are never evicted.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import time
+
+ARTIFACT_CLASSES = ("venvs", "node_repos", "models", "uv_cache", "pip_cache", "logs")
+
+GB = 1024 ** 3
+DEFAULT_BUDGETS = {
+    "venvs": 40 * GB,
+    "node_repos": 5 * GB,
+    "models": 20 * GB,
+    "uv_cache": 50 * GB,
+    "pip_cache": 20 * GB,
+    "logs": 2 * GB
+}
+
+# Files that determine the venv `uv sync` builds
+LOCK_FILES = ("uv.lock", "pyproject.toml", "requirements.txt")
+
+# Directories under custom_nodes that belong to the test harness, not to a node under test
+HARNESS_NODE_DIRS = ("ComfyUI-Manager", "__pycache__")
+
+USAGE_INDEX_FILE = "usage.json"
+
+
+def disk_usage(path, seen_inodes=None):
+    """
+    Return the bytes a file or directory tree occupies on disk.
+
+    Hardlinked files (e.g. uv's link mode or cached environments) are only
+    counted once per `seen_inodes` set.
+    """
+    if seen_inodes is None:
+        seen_inodes = set()
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.lstat(current)
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) in seen_inodes:
+            continue
+        seen_inodes.add((st.st_dev, st.st_ino))
+        total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+        if os.path.isdir(current) and not os.path.islink(current):
+            try:
+                with os.scandir(current) as it:
+                    stack.extend(entry.path for entry in it)
+            except OSError:
+                continue
+    return total
+
+
+def get_uv_cache_dir():
+    """Return uv's cache directory, or None if uv is not available."""
+    if os.environ.get("UV_CACHE_DIR"):
+        return os.environ["UV_CACHE_DIR"]
+    try:
+        out = subprocess.run(["uv", "cache", "dir"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() if out.returncode == 0 and out.stdout.strip() else None
+
+
+def load_usage_index(ci_cache_dir):
+    """Load the last-used timestamps recorded with mark_used()."""
+    try:
+        with open(os.path.join(ci_cache_dir, USAGE_INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def mark_used(paths, ci_cache_dir):
+    """Record that the given artifact paths were used now, for LRU ordering."""
+    index = load_usage_index(ci_cache_dir)
+    now = time.time()
+    for path in paths:
+        index[os.path.abspath(path)] = now
+    os.makedirs(ci_cache_dir, exist_ok=True)
+    tmp_path = os.path.join(ci_cache_dir, f"{USAGE_INDEX_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(ci_cache_dir, USAGE_INDEX_FILE))
+
+
+def git_tracked_files(repo_dir, subdir):
+    """
+    List the files a git checkout tracks under subdir.
+
+    Returns:
+        set: Paths relative to repo_dir with "/" separators, or None if git cannot tell
+    """
+    try:
+        out = subprocess.run(["git", "-C", repo_dir, "ls-files", "-z", "--", subdir], capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if out.returncode != 0:
+        return None
+    return {path.decode("utf-8", "surrogateescape") for path in out.stdout.split(b"\0") if path}
+
+
+def remove_tree(path, ignore_errors=False):
+    """
+    Delete a directory tree, including read-only files.
+
+    Windows refuses to delete read-only files (e.g. from wheels that ship them,
+    or envs cached by earlier versions of this module), so they are made
+    writable and retried.
+    """
+    def retry_writable(func, failed_path, _):
+        try:
+            os.chmod(failed_path, os.stat(failed_path).st_mode | stat.S_IWRITE)
+            func(failed_path)
+        except OSError:
+            if not ignore_errors:
+                raise
+
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=retry_writable)
+    else:
+        shutil.rmtree(path, onerror=retry_writable)
+
+
+def _children(path):
+    try:
+        with os.scandir(path) as it:
+            return sorted(entry.path for entry in it)
+    except OSError:
+        return []
+
+
+def discover_artifacts(comfy_dir, work_dir, ci_cache_dir, uv_cache_dir=None):
+    """
+    Find all CI artifacts and measure them.
+
+    Returns:
+        list: Dicts with class, path, node_id, bytes and last_used
+    """
+    candidates = []
+    venv_path = os.path.join(comfy_dir, ".venv")
+    if os.path.exists(venv_path):
+        candidates.append(("venvs", venv_path, None))
+    for env_path in _children(os.path.join(ci_cache_dir, "envs")):
+        if os.path.isdir(env_path):
+            candidates.append(("venvs", env_path, None))
+
+    for node_path in _children(os.path.join(comfy_dir, "custom_nodes")):
+        name = os.path.basename(node_path)
+        if os.path.isdir(node_path) and name not in HARNESS_NODE_DIRS:
+            candidates.append(("node_repos", node_path, name))
+
+    # Models are evicted per file/folder inside each model type folder. Files the
+    # ComfyUI repo ships there (models/configs/*.yaml, placeholders) are never
+    # candidates: evicting them breaks checkpoint loading and dirties the checkout
+    tracked = git_tracked_files(comfy_dir, "models")
+    tracked_dirs = {os.path.dirname(path) for path in tracked or ()}
+    for type_path in _children(os.path.join(comfy_dir, "models")):
+        if tracked is None and os.path.basename(type_path) == "configs":
+            continue
+        for model_path in _children(type_path):
+            rel_path = os.path.relpath(model_path, comfy_dir).replace(os.sep, "/")
+            if os.path.basename(model_path).startswith("put_"):
+                continue
+            if tracked is not None and (rel_path in tracked or any(
+                d == rel_path or d.startswith(rel_path + "/") for d in tracked_dirs
+            )):
+                continue
+            candidates.append(("models", model_path, None))
+
+    if uv_cache_dir and os.path.isdir(uv_cache_dir):
+        candidates.append(("uv_cache", uv_cache_dir, None))
+    # pip has no size cap of its own, so its cached wheels and HTTP responses
+    # are evicted file by file, least recently written first
+    for dirpath, dirnames, filenames in os.walk(os.path.join(ci_cache_dir, "pip")):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            candidates.append(("pip_cache", os.path.join(dirpath, filename), None))
+
+    for path in _children(work_dir):
+        name = os.path.basename(path)
+        if name.startswith(("comfyui_test_log_", "comfyui_test_results_", "comfyui_disk_usage_", "comfyui_footprint_report_",
+                            "comfyui_bisect_")):
+            candidates.append(("logs", path, None))
+    for run_path in _children(os.path.join(work_dir, "logs")):
+        for node_log in _children(run_path):
+            node_id = os.path.basename(node_log).split(".jsonl")[0]
+            candidates.append(("logs", node_log, node_id))
+
+    index = load_usage_index(ci_cache_dir)
+    seen_inodes = set()
+    artifacts = []
+    for artifact_class, path, node_id in candidates:
+        try:
+            mtime = os.lstat(path).st_mtime
+        except OSError:
+            continue
+        artifacts.append({
+            "class": artifact_class,
+            "path": path,
+            "node_id": node_id,
+            "bytes": disk_usage(path, seen_inodes),
+            "last_used": max(mtime, index.get(os.path.abspath(path), 0))
+        })
+    return artifacts
+
+
+def summarize_usage(artifacts):
+    """
+    Aggregate artifact sizes.
+
+    Returns:
+        dict: {"total_bytes", "by_class": {class: {"bytes", "count"}}, "by_node": {node_id: bytes}}
+    """
+    by_class = {artifact_class: {"bytes": 0, "count": 0} for artifact_class in ARTIFACT_CLASSES}
+    by_node = {}
+    for artifact in artifacts:
+        by_class[artifact["class"]]["bytes"] += artifact["bytes"]
+        by_class[artifact["class"]]["count"] += 1
+        if artifact["node_id"]:
+            by_node[artifact["node_id"]] = by_node.get(artifact["node_id"], 0) + artifact["bytes"]
+    return {
+        "total_bytes": sum(entry["bytes"] for entry in by_class.values()),
+        "by_class": by_class,
+        "by_node": dict(sorted(by_node.items(), key=lambda item: item[1], reverse=True))
+    }
+
+
+def _is_protected(path, protected):
+    """A path is protected if it is, contains or lies inside a protected path."""
+    path = os.path.abspath(path)
+    for protected_path in protected:
+        protected_path = os.path.abspath(protected_path)
+        if os.path.commonpath([path, protected_path]) in (path, protected_path):
+            return True
+    return False
+
+
+def plan_eviction(artifacts, budgets, protected=()):
+    """
+    Pick least recently used artifacts to evict until every class fits its budget.
+
+    Returns:
+        list: Artifacts to evict
+    """
+    evict = []
+    for artifact_class in ARTIFACT_CLASSES:
+        budget = budgets.get(artifact_class)
+        if budget is None:
+            continue
+        members = [a for a in artifacts if a["class"] == artifact_class]
+        used = sum(a["bytes"] for a in members)
+        for artifact in sorted(members, key=lambda a: a["last_used"]):
+            if used <= budget:
+                break
+            if _is_protected(artifact["path"], protected):
+                continue
+            evict.append(artifact)
+            used -= artifact["bytes"]
+    return evict
+
+
+def evict_artifact(artifact):
+    """Delete an artifact from disk. The uv cache is cleaned through uv so its lock is respected."""
+    path = artifact["path"]
+    if artifact["class"] == "uv_cache":
+        subprocess.run(["uv", "cache", "clean"], capture_output=True)
+    elif os.path.isdir(path) and not os.path.islink(path):
+        remove_tree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def collect_garbage(comfy_dir, work_dir, ci_cache_dir, budgets, protected=(), dry_run=False):
+    """
+    Measure all artifacts and evict LRU ones down to the budgets.
+
+    Returns:
+        dict: {"before": summary, "after": summary, "evicted": [artifacts]}
+    """
+    uv_cache_dir = get_uv_cache_dir()
+    artifacts = discover_artifacts(comfy_dir, work_dir, ci_cache_dir, uv_cache_dir)
+    before = summarize_usage(artifacts)
+
+    # `uv cache prune` only drops unreferenced entries, so try it before evicting the whole cache
+    uv_budget = budgets.get("uv_cache")
+    if not dry_run and uv_budget is not None and before["by_class"]["uv_cache"]["bytes"] > uv_budget:
+        subprocess.run(["uv", "cache", "prune"], capture_output=True)
+        artifacts = discover_artifacts(comfy_dir, work_dir, ci_cache_dir, uv_cache_dir)
+
+    evicted = plan_eviction(artifacts, budgets, protected)
+    if not dry_run:
+        for artifact in evicted:
+            evict_artifact(artifact)
+    evicted_paths = {a["path"] for a in evicted}
+    after = summarize_usage([a for a in artifacts if a["path"] not in evicted_paths])
+    return {"before": before, "after": after, "evicted": evicted}
+
+
+def env_cache_key(comfy_dir, sync_cmd):
+    """Hash the lockfiles and command that determine the venv `uv sync` builds."""
+    digest = hashlib.sha256(sync_cmd.encode("utf-8"))
+    for name in LOCK_FILES:
+        path = os.path.join(comfy_dir, name)
+        if os.path.isfile(path):
+            digest.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def link_tree(src, dst):
+    """
+    Recreate a directory tree at dst with every file hardlinked to src.
+
+    Installers replace files instead of writing into them (uv itself hardlinks
+    from its cache), so installing into the copy leaves src untouched. A venv's
+    scripts hold absolute paths, so it may only be restored where it was built.
+    """
+    if os.path.exists(dst):
+        remove_tree(dst)
+    shutil.copytree(src, dst, symlinks=True, copy_function=os.link)
+
+
+def _file_stats(root):
+    """Map each regular file under root to [size, mtime_ns]."""
+    stats = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            st = os.lstat(path)
+            if not os.path.islink(path):
+                stats[os.path.relpath(path, root)] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def _stats_path(cache_path):
+    return f"{cache_path}.files.json"
+
+
+def store_env(venv_path, cache_path):
+    """
+    Add a freshly synced venv to the environment cache, atomically.
+
+    The restored .venv shares inodes with the cache, so a node writing into a
+    venv file in place changes the cached env for every later cell. Making the
+    shared files read-only would also make the live venv read-only, so
+    instead their sizes and mtimes are recorded and verify_env() checks them
+    before each restore.
+    """
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    link_tree(venv_path, tmp_path)
+    if os.path.exists(cache_path):
+        remove_tree(tmp_path)
+        return
+    with open(_stats_path(cache_path), "w", encoding="utf-8") as f:
+        json.dump(_file_stats(tmp_path), f)
+    os.rename(tmp_path, cache_path)
+
+
+def verify_env(cache_path):
+    """Return True if a cached env still has the files store_env() recorded, unmodified."""
+    try:
+        with open(_stats_path(cache_path), "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        return os.path.isdir(cache_path) and _file_stats(cache_path) == recorded
+    except (OSError, ValueError):
+        return False
+
+
+def remove_env(cache_path):
+    """Drop an env from the cache."""
+    remove_tree(cache_path, ignore_errors=True)
+    try:
+        os.remove(_stats_path(cache_path))
+    except OSError:
+        pass
+
+
+def format_bytes(num_bytes):
+    """Format a byte count for humans."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and garbage-collect CI disk usage")
+    parser.add_argument("--comfy-dir", default="./ComfyUI", help="ComfyUI directory")
+    parser.add_argument("--cache-dir", default="./.ci_cache", help="CI cache directory")
+    parser.add_argument("--gc", action="store_true", help="Evict artifacts down to the default budgets")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what --gc would evict")
+    args = parser.parse_args()
+
+    comfy_dir = os.path.abspath(args.comfy_dir)
+    ci_cache_dir = os.path.abspath(args.cache_dir)
+    if args.gc or args.dry_run:
+        report = collect_garbage(comfy_dir, os.getcwd(), ci_cache_dir, DEFAULT_BUDGETS, dry_run=args.dry_run)
+        for artifact in report["evicted"]:
+            print(f"{'Would evict' if args.dry_run else 'Evicted'} {artifact['path']} ({format_bytes(artifact['bytes'])})")
+        summary = report["after"]
+    else:
+        summary = summarize_usage(discover_artifacts(comfy_dir, os.getcwd(), ci_cache_dir, get_uv_cache_dir()))
+
+    for artifact_class, usage in summary["by_class"].items():
+        budget = DEFAULT_BUDGETS.get(artifact_class)
+        print(f"{artifact_class:<12} {format_bytes(usage['bytes']):>10} / {format_bytes(budget):>10} ({usage['count']} entries)")
+    print(f"{'total':<12} {format_bytes(summary['total_bytes']):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Package footprint of a custom node: what its install added to the venv.
+
+Installed distributions are snapshotted straight from the *.dist-info folders
+in site-packages (no pip subprocess), once before and once after a node's
+install. Sizes come from each distribution's RECORD file, so the diff never
+has to walk the venv. Download sizes and source builds are not recorded in
+site-packages; they are parsed from the installer output instead.
+"""
+import csv
+import os
+import re
+
+# Packages whose version changes most often break other nodes
+KEY_PACKAGES = ("torch", "torchvision", "torchaudio", "numpy")
+
+SIZE_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3
+}
+
+# uv: " Downloading torch (2.3GiB)"; pip: "Downloading numpy-2.0.0-cp312-....whl (15.6 MB)"
+DOWNLOAD_PATTERN = re.compile(r"Downloading\s+(\S+?)(?:-\d[^\s]*)?\s+\((\d+(?:\.\d+)?)\s*([KMG]i?B|B)\)", re.IGNORECASE)
+# uv: "Building insightface==0.7.3"; pip: "Building wheel for insightface (pyproject.toml)"
+BUILD_PATTERN = re.compile(r"Building (?:wheel for )?([A-Za-z0-9][A-Za-z0-9._-]*?)(?:==\S+|\s+\(|\s*$)", re.MULTILINE)
+
+
+def normalize_name(name):
+    """Normalize a distribution name as in PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _record_size(dist_info_path):
+    """Sum the file sizes listed in a distribution's RECORD."""
+    total = 0
+    try:
+        with open(os.path.join(dist_info_path, "RECORD"), "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 3 and row[2].isdigit():
+                    total += int(row[2])
+    except OSError:
+        pass
+    return total
+
+
+def snapshot_distributions(site_packages_dir):
+    """
+    Snapshot the distributions installed in a site-packages directory.
+
+    Returns:
+        dict: {normalized name: {"name", "version", "bytes"}}
+    """
+    distributions = {}
+    if not site_packages_dir or not os.path.isdir(site_packages_dir):
+        return distributions
+    with os.scandir(site_packages_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".dist-info"):
+                continue
+            # Folder names are "<name>-<version>.dist-info" with "-" escaped in both parts
+            name, _, version = entry.name[:-len(".dist-info")].partition("-")
+            distributions[normalize_name(name)] = {
+                "name": name,
+                "version": version,
+                "bytes": _record_size(entry.path)
+            }
+    return distributions
+
+
+def freeze(distributions):
+    """Render a snapshot as sorted requirement pins."""
+    return sorted(f"{d['name']}=={d['version']}" for d in distributions.values())
+
+
+def _release(version):
+    """Numeric release tuple of a version, ignoring pre/post/local parts."""
+    match = re.match(r"(\d+(?:\.\d+)*)", version)
+    return tuple(int(part) for part in match.group(1).split(".")) if match else ()
+
+
+def diff_distributions(before, after):
+    """
+    Compare two snapshots.
+
+    Returns:
+        dict: added/removed {name: version}, upgraded/downgraded/changed {name: [old, new]}
+            (changed = same release, different build such as +cu126 -> +cpu), and bytes_added
+    """
+    diff = {"added": {}, "removed": {}, "upgraded": {}, "downgraded": {}, "changed": {}, "bytes_added": 0}
+    for key in after.keys() - before.keys():
+        diff["added"][after[key]["name"]] = after[key]["version"]
+        diff["bytes_added"] += after[key]["bytes"]
+    for key in before.keys() - after.keys():
+        diff["removed"][before[key]["name"]] = before[key]["version"]
+        diff["bytes_added"] -= before[key]["bytes"]
+    for key in before.keys() & after.keys():
+        old, new = before[key], after[key]
+        if old["version"] == new["version"]:
+            continue
+        old_release, new_release = _release(old["version"]), _release(new["version"])
+        if new_release > old_release:
+            kind = "upgraded"
+        elif new_release < old_release:
+            kind = "downgraded"
+        else:
+            kind = "changed"
+        diff[kind][new["name"]] = [old["version"], new["version"]]
+        diff["bytes_added"] += new["bytes"] - old["bytes"]
+    for kind in ("added", "removed", "upgraded", "downgraded", "changed"):
+        diff[kind] = dict(sorted(diff[kind].items()))
+    return diff
+
+
+def parse_install_log(install_log):
+    """
+    Extract download sizes and source builds from pip/uv output.
+
+    Returns:
+        dict: {"download_bytes", "downloads": {name: bytes}, "built_from_source": [names]}
+    """
+    downloads = {}
+    for name, size, unit in DOWNLOAD_PATTERN.findall(install_log or ""):
+        # pip prints full URLs for some indexes
+        name = name.rsplit("/", 1)[-1]
+        downloads[normalize_name(name)] = int(float(size) * SIZE_UNITS[unit.lower()])
+    built = sorted({normalize_name(name) for name in BUILD_PATTERN.findall(install_log or "")})
+    return {
+        "download_bytes": sum(downloads.values()),
+        "downloads": downloads,
+        "built_from_source": built
+    }
+
+
+def build_footprint(before, after, install_log=""):
+    """
+    Build the footprint record of one node install.
+
+    Returns:
+        dict: The package diff plus download/build info and key package changes
+    """
+    footprint = diff_distributions(before, after)
+    footprint.update(parse_install_log(install_log))
+    footprint["packages_added"] = len(footprint["added"])
+    footprint["key_package_changes"] = {}
+    for kind in ("upgraded", "downgraded", "changed", "removed"):
+        for name, versions in footprint[kind].items():
+            if normalize_name(name) in KEY_PACKAGES:
+                before_version, after_version = versions if kind != "removed" else (versions, None)
+                footprint["key_package_changes"][name] = {
+                    "change": kind, "before": before_version, "after": after_version
+                }
+    return footprint
+
+
+def rank_footprints(results):
+    """
+    Rank nodes by how much they add to the environment.
+
+    Args:
+        results: List of result_data dicts from main.py
+
+    Returns:
+        list: One summary per node, largest footprint first
+    """
+    ranking = []
+    for result_data in results:
+        footprint = result_data.get("footprint")
+        if not footprint:
+            continue
+        ranking.append({
+            "node_name": result_data["node_name"],
+            "version": result_data.get("version"),
+            "extra": result_data.get("extra"),
+            "bytes_added": footprint["bytes_added"],
+            "download_bytes": footprint["download_bytes"],
+            "packages_added": footprint["packages_added"],
+            "packages_changed": len(footprint["upgraded"]) + len(footprint["downgraded"]) + len(footprint["changed"]),
+            "built_from_source": footprint["built_from_source"],
+            "key_package_changes": footprint["key_package_changes"]
+        })
+    return sorted(ranking, key=lambda r: (r["bytes_added"], r["packages_added"]), reverse=True)
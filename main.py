@@ -1,3 +1,4 @@
+import argparse
 import json
 import subprocess
 import datetime
@@ -5,22 +6,48 @@ import requests
 import time
 import os
 import logging
+import logging.handlers
+import queue
+import gzip
 import sys
 from colorama import init, Fore, Style
 import shutil
+from smoke import run_smoke_tests
+from snapshots import DEFAULT_CORE_ID, snapshot_object_info
+from cache_manager import collect_garbage, disk_usage, format_bytes, mark_used, env_cache_key, link_tree, store_env, verify_env, remove_env, remove_tree, DEFAULT_BUDGETS
+from resource_governor import ResourceGovernor
+from footprint import snapshot_distributions, freeze, build_footprint, rank_footprints
+from matrix import expand_matrix, schedule_matrix, install_spec, cell_id, DEFAULT_VERSION
+from scheduler import load_requirement_history, order_by_similarity, schedule_report
+from progress import ProgressTracker, load_duration_history, start_progress_server
+from node_list import fetch_pages, load_node_list, parse_nodes, select_nodes, with_repositories, NodeListUnavailable, DEFAULT_SOURCE
+from start import read_git_head
 
 # Initialize colorama
 init(autoreset=True)
 
-# Configure logging to write to both console and file
+# Logs go to the console, a run-wide JSON lines file and one JSON lines file per
+# node (gzipped once the node is done). All handlers run on a QueueListener
+# thread so the orchestrator never blocks on terminal or disk I/O.
 timestamp = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-log_filename = f"comfyui_test_log_{timestamp}.log"
+RUN_ID = timestamp  # Identifies this run's object_info snapshot manifest and node log folder
+log_filename = f"comfyui_test_log_{timestamp}.jsonl"
+NODE_LOG_DIR = os.path.join(os.path.abspath("./logs"), RUN_ID)
 
 # Create logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Create console handler with color formatting
+# Node and step currently being tested, attached to every record
+_log_context = {"node_id": None, "step": None}
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+_queue_handler = None
+_step_started_at = None
+
+# Live progress, served over HTTP while main() runs
+progress = ProgressTracker()
+
 class ColoredFormatter(logging.Formatter):
     """Custom formatter to add colors to log messages"""
     
@@ -33,36 +60,159 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        levelname = record.levelname
-        color = self.COLORS.get(levelname, '')
+        # Colors are applied to the formatted string only; the record itself
+        # is shared with the file handlers and must stay uncolored.
+        color = getattr(record, "color", None) or self.COLORS.get(record.levelname, '')
         reset = Style.RESET_ALL if color else ''
-        
-        # Format the message with color
-        record.msg = f"{color}{record.msg}{reset}"
-        return super().format(record)
-
-# Create console handler
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-console_formatter = ColoredFormatter('%(message)s')
-console_handler.setFormatter(console_formatter)
-
-# Create file handler (without colors)
-file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-file_handler.setLevel(logging.INFO)
-file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(file_formatter)
-
-# Add handlers to logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+        return f"{color}{super().format(record)}{reset}"
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as one JSON object per line for the log files"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.utcfromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "node_id": getattr(record, "node_id", None),
+            "step": getattr(record, "step", None),
+            "message": record.getMessage()
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+class LogContextFilter(logging.Filter):
+    """Attaches the current node id and step to each record before it is queued"""
+
+    def filter(self, record):
+        for key, value in _log_context.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class NodeLogHandler(logging.Handler):
+    """Writes records of each node to its own file and compresses it once the node is done"""
+
+    def __init__(self, log_dir):
+        super().__init__()
+        self.log_dir = log_dir
+        self.streams = {}
+
+    def emit(self, record):
+        node_id = getattr(record, "node_id", None)
+        if node_id is None:
+            return
+        try:
+            if getattr(record, "close_node_log", False):
+                self.close_node(node_id)
+                return
+            stream = self.streams.get(node_id)
+            if stream is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                stream = open(os.path.join(self.log_dir, f"{node_id}.jsonl"), "a", encoding="utf-8")
+                self.streams[node_id] = stream
+            stream.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def close_node(self, node_id):
+        stream = self.streams.pop(node_id, None)
+        if stream is None:
+            return
+        stream.close()
+        compress_log_file(stream.name)
+
+    def close(self):
+        for node_id in list(self.streams):
+            self.close_node(node_id)
+        super().close()
+
+def compress_log_file(path):
+    """Gzip a finished log file in place of the original"""
+    with open(path, "rb") as f_in, gzip.open(f"{path}.gz", "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(path)
+
+def _is_log_record(record):
+    """Filters out the control records used to close node logs"""
+    return not getattr(record, "close_node_log", False)
+
+def setup_logging():
+    """Route all logging through a queue to console, run and per-node log handlers"""
+    global _log_listener, _queue_handler
+
+    # Create console handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(ColoredFormatter('%(message)s'))
+    console_handler.addFilter(_is_log_record)
+
+    # Create file handlers (without colors)
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(JsonLinesFormatter())
+    file_handler.addFilter(_is_log_record)
+
+    node_handler = NodeLogHandler(NODE_LOG_DIR)
+    node_handler.setLevel(logging.INFO)
+    node_handler.setFormatter(JsonLinesFormatter())
+
+    _queue_handler = logging.handlers.QueueHandler(_log_queue)
+    _queue_handler.addFilter(LogContextFilter())
+    logger.addHandler(_queue_handler)
+
+    _log_listener = logging.handlers.QueueListener(
+        _log_queue, console_handler, file_handler, node_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+
+def shutdown_logging():
+    """Flush queued records and close all log files"""
+    global _log_listener, _queue_handler
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+        if os.path.exists(log_filename):
+            compress_log_file(log_filename)
+
+def set_log_context(node_id=None, step=None):
+    """Set the node and step attached to subsequent log records"""
+    _log_context["node_id"] = node_id
+    _log_context["step"] = step
+
+def begin_step(result_data, step):
+    """Start timing a pipeline step of the node in result_data and tag log records with it"""
+    global _step_started_at
+    end_step(result_data)
+    set_log_context(node_id=result_data["log_id"], step=step)
+    progress.set_step(step)
+    _step_started_at = time.time()
+
+def end_step(result_data):
+    """Record the duration of the running step in result_data["step_timings"] and clear the log context"""
+    global _step_started_at
+    step = _log_context["step"]
+    if step is not None and _step_started_at is not None:
+        timings = result_data["step_timings"]
+        timings[step] = timings.get(step, 0) + time.time() - _step_started_at
+    _step_started_at = None
+    set_log_context()
+    progress.set_step(None)
+
+def close_node_log(node_id):
+    """Ask the listener thread to close and compress a node's log file"""
+    record = logging.makeLogRecord({
+        "levelno": logging.INFO, "levelname": "INFO", "node_id": node_id, "step": None, "close_node_log": True
+    })
+    _log_queue.put_nowait(record)
 
 # Utility function to log with specific color
 def log_colored(message, color=None, level=logging.INFO):
     """Log a message with a specific color"""
-    if color:
-        message = f"{color}{message}{Style.RESET_ALL}"
-    logger.log(level, message)
+    logger.log(level, message, extra={"color": color} if color else None)
 
 # Shortcut functions for common colored logs
 def log_success(message):
@@ -92,14 +242,39 @@ def log_separator(char="-", length=80):
 # Configuration
 COMFYUI_DIR = os.path.abspath("./ComfyUI")  # ComfyUI installation directory using absolute path
 COMFYUI_PORT = 8188  # Default ComfyUI port
+SMOKE_TEST_TIMEOUT = 60  # Max seconds a single smoke workflow may run
+OBJECT_INFO_STORE_DIR = os.path.abspath("./object_info_store")  # Content-addressed object_info snapshots
+CI_CACHE_DIR = os.path.abspath("./.ci_cache")  # Cached environments and cache bookkeeping
+CACHE_BUDGETS = dict(DEFAULT_BUDGETS)  # Max bytes per artifact class, enforced before each run
+SCHEDULE_BY_SIMILARITY = True  # Run nodes with similar dependencies back to back (see scheduler.py)
+PROGRESS_HOST = "127.0.0.1"  # Progress endpoint (/metrics, /status) address
+PROGRESS_PORT = 9188  # Progress endpoint port, None to disable
+NODE_LIST_CACHE_DIR = os.path.join(CI_CACHE_DIR, "node_list")  # Cached registry responses
+
+# Limits for everything a node's install and server commands start. Without a
+# cgroup, pids is RLIMIT_NPROC, which counts all processes of the user
+NODE_RESOURCE_LIMITS = {
+    "memory_bytes": 32 * 1024 ** 3,
+    "cpu_cores": os.cpu_count(),
+    "pids": 4096,
+    "cpu_seconds": None
+}
 
 COMFYUI_MANAGER_DIR = os.path.join(COMFYUI_DIR, "custom_nodes", "ComfyUI-Manager")
 
-UV_SYNC_CMD = "uv sync --extra cu126"
+# Torch extra for TOP_NODES entries that do not list "extras"; mac uses cpu
+DEFAULT_TORCH_EXTRA = "cpu" if sys.platform == "darwin" else "cu126"
 
-# If mac, use --cpu
-if sys.platform == "darwin":
-    UV_SYNC_CMD = "uv sync --extra cpu"
+# Pristine venvs per (lockfile, sync command), restored by hardlinking instead of re-synced
+ENV_CACHE_DIR = os.path.join(CI_CACHE_DIR, "envs")
+# Wheel cache shared by every cell's install (uv already shares its own cache)
+PIP_CACHE_DIR = os.path.join(CI_CACHE_DIR, "pip")
+
+def uv_sync_cmd(extra):
+    """Return the command that syncs ComfyUI's venv with a torch extra"""
+    # --compile-bytecode makes uv precompile site-packages in parallel, so server
+    # boot times in STEP 3 do not include lazy .pyc compilation
+    return f"uv sync --compile-bytecode --extra {extra}"
 
 # Set the correct virtual environment Python path based on platform
 if sys.platform == "win32":
@@ -108,7 +283,8 @@ else:
     VENV_PYTHON = ".venv/bin/python"
 
 
-# 1) Prepare list of top 100 custom nodes
+# 1) Prepare list of top 100 custom nodes. Entries may also list "versions"
+# (latest, nightly or pinned) and torch "extras" to test; see matrix.py
 TOP_NODES = [
   {
     "id": "comfyui-impact-pack"
@@ -414,15 +590,18 @@ TOP_NODES = [
 
 # Utility function to run commands in a shell and capture output.
 # Returns (return_code, stdout, stderr).
-def run_cmd(cmd, cwd=None, env=None):
+def run_cmd(cmd, cwd=None, env=None, governor=None):
     """
     Run a command in a shell and capture output.
     Args:
         cmd: Command to run
         cwd: Working directory for the command
         env: Dictionary of environment variables to add/override
+        governor: Optional ResourceGovernor to run the command under
     """
     log_command(f"Running command: {cmd} {env} {cwd}")
+    if governor:
+        cmd = governor.wrap_command(cmd)
     
     # Start with current environment
     process_env = os.environ.copy()
@@ -438,33 +617,152 @@ def run_cmd(cmd, cwd=None, env=None):
         cwd=cwd,
         env=process_env
     )
-    out, err = process.communicate()
-    return process.returncode, out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+    if governor:
+        with governor.measure():
+            out, err = process.communicate()
+    else:
+        out, err = process.communicate()
+    out, err = out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+    if governor:
+        governor.note_exit(process.returncode, err)
+    return process.returncode, out, err
+
+def list_custom_node_dirs():
+    """Return the names of all directories under ComfyUI's custom_nodes folder."""
+    custom_nodes_dir = os.path.join(COMFYUI_DIR, "custom_nodes")
+    if not os.path.isdir(custom_nodes_dir):
+        return set()
+    return {name for name in os.listdir(custom_nodes_dir) if os.path.isdir(os.path.join(custom_nodes_dir, name))}
+
+def get_site_packages_dir():
+    """Return the site-packages directory of ComfyUI's venv, or None if it does not exist."""
+    if sys.platform == "win32":
+        candidates = [os.path.join(COMFYUI_DIR, ".venv", "Lib", "site-packages")]
+    else:
+        lib_dir = os.path.join(COMFYUI_DIR, ".venv", "lib")
+        candidates = [
+            os.path.join(lib_dir, name, "site-packages")
+            for name in (os.listdir(lib_dir) if os.path.isdir(lib_dir) else [])
+            if name.startswith("python")
+        ]
+    return next((path for path in candidates if os.path.isdir(path)), None)
+
+def snapshot_site_packages():
+    """Return {entry name: mtime_ns} for the top level of site-packages."""
+    site_packages = get_site_packages_dir()
+    if site_packages is None:
+        return {}
+    with os.scandir(site_packages) as it:
+        return {entry.name: entry.stat(follow_symlinks=False).st_mtime_ns for entry in it}
+
+def precompile_bytecode(paths):
+    """
+    Compile .pyc files for the given paths with the venv's Python, using all cores.
+
+    Returns:
+        tuple: (return_code, stdout, stderr)
+    """
+    if not paths:
+        return 0, "", ""
+    quoted = " ".join(f'"{path}"' for path in paths)
+    return run_cmd(f"{VENV_PYTHON} -m compileall -q -j 0 {quoted}", cwd=COMFYUI_DIR)
+
+def build_install_manifest(node_dirs):
+    """
+    Record what an install created under custom_nodes.
+
+    Args:
+        node_dirs: Names of the directories the install added
+
+    Returns:
+        dict: {"node_dirs": [{"name", "module", "branch", "commit", "files"}]}; files are
+            relative paths without .git and __pycache__
+    """
+    manifest = {"node_dirs": []}
+    for name in sorted(node_dirs):
+        node_dir = os.path.join(COMFYUI_DIR, "custom_nodes", name)
+        branch, commit = read_git_head(node_dir)
+        files = []
+        for root, dirs, filenames in os.walk(node_dir):
+            dirs[:] = sorted(d for d in dirs if d not in (".git", "__pycache__"))
+            rel_root = os.path.relpath(root, node_dir)
+            files.extend(os.path.normpath(os.path.join(rel_root, filename)).replace(os.sep, "/") for filename in sorted(filenames))
+        manifest["node_dirs"].append({
+            # ComfyUI imports each directory under custom_nodes as a module of the same name
+            "name": name,
+            "module": f"custom_nodes.{name}",
+            "branch": branch,
+            "commit": commit,
+            "files": files
+        })
+    return manifest
 
-def check_node_in_object_info(node_id, object_info):
+def build_module_index(object_info):
+    """
+    Index object_info entries by the custom node package that registered them.
+
+    Every entry is indexed under each lowercased dotted prefix of its module
+    below custom_nodes, so looking up a module m finds the entries whose module
+    is m or starts with m + "." in one step, case-insensitively. Directory
+    names may themselves contain dots, which is why the module is not split
+    at a fixed position.
+
+    Returns:
+        dict: {lowercased module prefix: [dicts with node_name, python_module and category]}
+    """
+    index = {}
+    for node_name, node_data in object_info.items():
+        python_module = node_data.get("python_module", "")
+        parts = python_module.lower().split(".")
+        if len(parts) < 2 or parts[0] != "custom_nodes":
+            continue
+        entry = {
+            "node_name": node_name,
+            "python_module": python_module,
+            "category": node_data.get("category", "unknown")
+        }
+        for end in range(2, len(parts) + 1):
+            index.setdefault(".".join(parts[:end]), []).append(entry)
+    return index
+
+def find_node_entries(node_id, object_info, module_names=(), index=None):
+    """
+    Find all object_info entries registered by a custom node.
+
+    Args:
+        node_id: The ID of the custom node
+        object_info: The parsed JSON response from /object_info endpoint
+        module_names: Modules recorded in the node's install manifest; the registry
+            id is also tried, since it usually matches the directory name
+        index: build_module_index(object_info), if already computed
+
+    Returns:
+        list: Dicts with node_name, python_module and category
+    """
+    if index is None:
+        index = build_module_index(object_info)
+    found_entries = {}
+    for module in dict.fromkeys(name.lower() for name in [*module_names, f"custom_nodes.{node_id}"]):
+        for entry in index.get(module, []):
+            found_entries.setdefault(entry["node_name"], entry)
+    return list(found_entries.values())
+
+def check_node_in_object_info(node_id, object_info, module_names=(), index=None):
     """
     Check if a custom node is properly installed by examining the object_info response.
-    Looks for entries with python_module starting with 'custom_nodes.<node_id>'
+    Looks for entries whose python_module is, case-insensitively, 'custom_nodes.<dir>'
+    or a submodule of it, for the directories the install created and for the node id.
     
     Args:
         node_id: The ID of the custom node to check
         object_info: The parsed JSON response from /object_info endpoint
+        module_names: Modules recorded in the node's install manifest
+        index: build_module_index(object_info), if already computed
     
     Returns:
         tuple: (bool, str) - (is_found, details_message)
     """
-    found_entries = []
-    
-    # Look through all nodes in object_info
-    for node_name, node_data in object_info.items():
-        python_module = node_data.get("python_module", "")
-        # Check for exact match or match followed by a dot (indicating a submodule)
-        if (python_module == f"custom_nodes.{node_id}"):
-            found_entries.append({
-                "node_name": node_name,
-                "python_module": python_module,
-                "category": node_data.get("category", "unknown")
-            })
+    found_entries = find_node_entries(node_id, object_info, module_names, index)
     
     if found_entries:
         details = "Found following entries:\n" + "\n".join(
@@ -475,10 +773,14 @@ def check_node_in_object_info(node_id, object_info):
     
     return False, "No matching entries found in object_info"
 
-def create_json_result_template(node_name):
+def create_json_result_template(node_name, version=DEFAULT_VERSION, extra=DEFAULT_TORCH_EXTRA):
     """Initialize a result structure (dict) for the JSON schema."""
     return {
         "node_name": node_name,
+        "version": version,
+        "extra": extra,
+        "cell_id": cell_id(node_name, version, extra),
+        "log_id": cell_id(node_name, version, extra),
         "timestamp": datetime.datetime.utcnow().isoformat(),
         "steps": {
             "reset_venv": {
@@ -491,22 +793,446 @@ def create_json_result_template(node_name):
                 "error_message": None
             },
             "install_node_status": {"success": False, "install_log": "", "error_message": None},
-            "restart_comfyui_status": {"success": False, "error_message": None},
+            "precompile_bytecode": {"success": False, "duration_seconds": None, "error_message": None},
+            "restart_comfyui_status": {"success": False, "startup_seconds": None, "error_message": None},
             "object_info_check": {
                 "success": False, 
                 "found_in_object_info": False,
                 "object_info_details": "",
                 "error_message": None
             },
+            "smoke_test": {
+                "success": False,
+                "node_classes": {},
+                "inconclusive": [],
+                "error_message": None
+            },
             "uninstall_node_status": {"success": False, "uninstall_log": "", "error_message": None}
         },
+        "disk_usage": {
+            "node_dirs": [],
+            "node_repo_bytes": 0,
+            "models_added_bytes": 0
+        },
+        "env_cache": None,
+        "install_manifest": {"node_dirs": []},
+        "step_timings": {},
         "final_outcome": "PENDING"
     }
 
-def main():
-    # Add this at the beginning of main to track the ComfyUI process
+def reset_venv(result_data):
+    """
+    STEP 1 of the pipeline: recreate ComfyUI's venv from scratch with uv sync,
+    using the result's torch extra.
+
+    Args:
+        result_data: The node's result dict, whose reset_venv step is filled in
+
+    Returns:
+        bool: True if the venv is ready
+    """
+    # Before running uv sync, remove the .venv folder if it exists
+    venv_path = os.path.join(COMFYUI_DIR, '.venv')
+    if os.path.exists(venv_path):
+        remove_tree(venv_path)
+        logger.info(f"Removed existing .venv folder at {venv_path}")
+
+    # Now run the sync command to recreate the environment
+    rc, out, err = run_cmd(uv_sync_cmd(result_data["extra"]), cwd=COMFYUI_DIR, env={"VIRTUAL_ENV": COMFYUI_DIR})
+    log_warning(f"Reset venv output: {out} {rc}")
+    if rc == 0:
+        result_data["steps"]["reset_venv"]["success"] = True
+        return True
+    result_data["steps"]["reset_venv"]["error_message"] = err
+    log_fatal(f"Failed to reset venv: {err}")
+    return False
+
+def env_cache_path(extra):
+    """Return where the pristine venv for a torch extra is cached at the current ComfyUI commit"""
+    return os.path.join(ENV_CACHE_DIR, env_cache_key(COMFYUI_DIR, uv_sync_cmd(extra)))
+
+def prepare_cached_env(result_data):
+    """
+    STEP 1 of the pipeline using the environment cache: restore the pristine
+    venv for the result's torch extra by hardlinking it, or build it with
+    reset_venv() and cache it.
+
+    Args:
+        result_data: The node's result dict, whose reset_venv step and env_cache are filled in
+
+    Returns:
+        bool: True if the venv is ready
+    """
+    venv_path = os.path.join(COMFYUI_DIR, ".venv")
+    cache_path = env_cache_path(result_data["extra"])
+    if os.path.isdir(cache_path) and not verify_env(cache_path):
+        log_warning(f"Cached environment {os.path.basename(cache_path)} was modified since it was stored, rebuilding it")
+        remove_env(cache_path)
+    result_data["env_cache"] = {"key": os.path.basename(cache_path), "cache_hit": os.path.isdir(cache_path)}
+
+    if result_data["env_cache"]["cache_hit"]:
+        link_tree(cache_path, venv_path)
+        logger.info(f"Restored cached environment {os.path.basename(cache_path)}")
+        result_data["steps"]["reset_venv"]["success"] = True
+    elif reset_venv(result_data):
+        store_env(venv_path, cache_path)
+        logger.info(f"Cached environment {os.path.basename(cache_path)}")
+    else:
+        return False
+    mark_used([cache_path], CI_CACHE_DIR)
+    return True
+
+def run_node_test(node_name, version=DEFAULT_VERSION, extra=DEFAULT_TORCH_EXTRA, prepare_env=prepare_cached_env,
+                  point_id=None, snapshot_store=OBJECT_INFO_STORE_DIR):
+    """
+    Run the full pipeline for one node: reset venv, install, boot ComfyUI,
+    check object_info, smoke test and uninstall.
+
+    Args:
+        node_name: The ID of the custom node to test
+        version: Node version to install: latest, nightly or a pinned version
+        extra: Torch extra the venv is synced with
+        prepare_env: STEP 1 callable taking result_data and returning True once
+            the venv is ready; reset_venv rebuilds it from scratch
+        point_id: Distinguishes repeated runs of the same cell (e.g. bisection
+            points); added to the node log name and the snapshot manifest's cell id
+        snapshot_store: Object store the object_info snapshot goes to
+
+    Returns:
+        dict: The node's result_data, including per-step timings
+    """
+    result_data = create_json_result_template(node_name, version, extra)
+    if point_id:
+        result_data["log_id"] = f"{result_data['cell_id']}_{point_id}"
+    set_log_context(node_id=result_data["log_id"])
+    models_dir = os.path.join(COMFYUI_DIR, "models")
     comfy_process = None
-    
+    governor = ResourceGovernor(result_data["cell_id"], NODE_RESOURCE_LIMITS)
+
+    try:
+        # --------------------------------------------------------------------
+        # STEP 1: Reset the venv (before installing node)
+        # --------------------------------------------------------------------
+        begin_step(result_data, "reset_venv")
+        logger.info(f"STEP 1: Reset the pip environment before installing {node_name}...")
+        if not prepare_env(result_data):
+            result_data["final_outcome"] = "FAILED_RESET_VENV"
+            return result_data
+
+        # --------------------------------------------------------------------
+        # STEP 2: Install the custom node using Manager
+        # --------------------------------------------------------------------
+        begin_step(result_data, "install_node")
+        logger.info(f"STEP 2: Installing node {install_spec(node_name, version)}...")
+        custom_node_dirs_before = list_custom_node_dirs()
+        site_packages_before = snapshot_site_packages()
+        models_bytes_before = disk_usage(models_dir)
+
+        # Freeze the installed distributions so the node's footprint can be diffed
+        distributions_before = snapshot_distributions(get_site_packages_dir())
+        result_data["steps"]["freeze_requirements_before_install"]["requirements_list"] = freeze(distributions_before)
+        result_data["steps"]["freeze_requirements_before_install"]["success"] = bool(distributions_before)
+        if not distributions_before:
+            result_data["steps"]["freeze_requirements_before_install"]["error_message"] = "No distributions found in the venv"
+
+        cmd_install_node = f"{VENV_PYTHON} custom_nodes/ComfyUI-Manager/cm-cli.py install {install_spec(node_name, version)}"
+        rc, out, err = run_cmd(cmd_install_node, cwd=COMFYUI_DIR, env={"PIP_CACHE_DIR": PIP_CACHE_DIR}, governor=governor)
+        # Recorded for failed installs too, since partial installs still change the venv
+        result_data["footprint"] = build_footprint(
+            distributions_before, snapshot_distributions(get_site_packages_dir()), out + "\n" + err
+        )
+        if rc == 0:
+            result_data["steps"]["install_node_status"]["success"] = True
+            log_success(f"Node {node_name} installed successfully")
+        else:
+            result_data["steps"]["install_node_status"]["error_message"] = err
+            result_data["final_outcome"] = "FAILED_INSTALL_NODE"
+            log_error(f"Failed to install node: {err}")
+            return result_data
+        result_data["steps"]["install_node_status"]["install_log"] = out + "\n" + err
+
+        # Record the directories the install actually created; registry ids often
+        # differ from them in case or spelling, and STEP 4 matches on them
+        result_data["install_manifest"] = build_install_manifest(list_custom_node_dirs() - custom_node_dirs_before)
+        installed_modules = [entry["module"] for entry in result_data["install_manifest"]["node_dirs"]]
+        for entry in result_data["install_manifest"]["node_dirs"]:
+            logger.info(f"Installed {entry['name']} at {entry['commit'] or 'unknown commit'} ({len(entry['files'])} files)")
+
+        # Precompile what the install added, so STEP 3 only measures real import work
+        precompile_start = time.time()
+        site_packages_dir = get_site_packages_dir()
+        new_packages = [
+            os.path.join(site_packages_dir, name)
+            for name, mtime in snapshot_site_packages().items()
+            if site_packages_before.get(name) != mtime and not name.endswith((".dist-info", ".pth"))
+        ]
+        new_node_dirs = [
+            os.path.join("custom_nodes", entry["name"]) for entry in result_data["install_manifest"]["node_dirs"]
+        ]
+        rc, out, err = precompile_bytecode(new_node_dirs + new_packages)
+        result_data["steps"]["precompile_bytecode"]["duration_seconds"] = time.time() - precompile_start
+        if rc == 0:
+            result_data["steps"]["precompile_bytecode"]["success"] = True
+            logger.info(f"Precompiled {len(new_node_dirs)} node dirs and {len(new_packages)} packages "
+                        f"in {time.time() - precompile_start:.1f}s")
+        else:
+            # Files that fail to compile would fail at import too; STEP 3/4 will report that
+            result_data["steps"]["precompile_bytecode"]["error_message"] = out + err
+            log_warning(f"Bytecode precompilation reported errors: {out} {err}")
+
+        # --------------------------------------------------------------------
+        # STEP 3: Start ComfyUI and wait for it to be ready
+        # --------------------------------------------------------------------
+        begin_step(result_data, "start_comfyui")
+        logger.info("STEP 3: Starting ComfyUI server...")
+        cmd_start_comfyui = "uv run main.py"
+        comfy_process = subprocess.Popen(
+            governor.wrap_command(cmd_start_comfyui, exec_command=True), shell=True, cwd=COMFYUI_DIR
+        )
+
+        # Wait for ComfyUI to start (max 60 seconds)
+        start_time = time.time()
+        server_ready = False
+        log_warning("Waiting for ComfyUI server to start (timeout: 60s)...")
+        while time.time() - start_time < 60:
+            with governor.measure():
+                exited = comfy_process.poll() is not None
+            if exited:
+                governor.note_exit(comfy_process.returncode)
+                log_error(f"ComfyUI server exited with code {comfy_process.returncode}")
+                break
+            try:
+                response = requests.get("http://127.0.0.1:8188/queue", timeout=1)
+                if response.status_code == 200:
+                    server_ready = True
+                    result_data["steps"]["restart_comfyui_status"]["startup_seconds"] = time.time() - start_time
+                    log_success(f"ComfyUI server started after {int(time.time() - start_time)} seconds")
+                    break
+            except requests.exceptions.RequestException:
+                time.sleep(1)
+                continue
+
+        if server_ready:
+            result_data["steps"]["restart_comfyui_status"]["success"] = True
+        else:
+            with governor.measure():
+                exited = comfy_process.poll() is not None
+            if exited:
+                result_data["steps"]["restart_comfyui_status"]["error_message"] = f"Server exited with code {comfy_process.returncode}"
+            else:
+                result_data["steps"]["restart_comfyui_status"]["error_message"] = "Server failed to start within 60 seconds"
+            result_data["final_outcome"] = "FAILED_START_COMFY"
+            log_error("ComfyUI server failed to start within timeout period")
+            if comfy_process:
+                comfy_process.terminate()
+                with governor.measure():
+                    comfy_process.wait()
+                log_success("ComfyUI process terminated successfully")
+                comfy_process = None
+
+            return result_data
+
+        # --------------------------------------------------------------------
+        # STEP 4: Check object_info to verify custom node installation
+        # --------------------------------------------------------------------
+        begin_step(result_data, "object_info_check")
+        logger.info(f"STEP 4: Checking if node {node_name} is properly installed...")
+        try:
+            response = requests.get(f"http://127.0.0.1:{COMFYUI_PORT}/object_info", timeout=5)
+            if response.status_code == 200:
+                object_info = response.json()
+                try:
+                    _, new_objects = snapshot_object_info(
+                        object_info, RUN_ID, snapshot_store, cell=result_data["log_id"], core_id=point_id or DEFAULT_CORE_ID
+                    )
+                    logger.info(f"Snapshotted object_info ({new_objects} new node class definitions stored)")
+                except OSError as e:
+                    log_warning(f"Failed to snapshot object_info: {str(e)}")
+                module_index = build_module_index(object_info)
+                found, details = check_node_in_object_info(node_name, object_info, installed_modules, module_index)
+                result_data["steps"]["object_info_check"]["success"] = True
+                result_data["steps"]["object_info_check"]["found_in_object_info"] = found
+                result_data["steps"]["object_info_check"]["object_info_details"] = details
+
+                if found:
+                    log_success(f"Node {node_name} found in object_info")
+                else:
+                    log_error(f"Node {node_name} NOT found in object_info")
+
+                # ------------------------------------------------------------
+                # STEP 4b: Execute smoke workflows for the node's classes
+                # ------------------------------------------------------------
+                class_names = [
+                    entry["node_name"] for entry in find_node_entries(node_name, object_info, installed_modules, module_index)
+                ]
+                if class_names:
+                    begin_step(result_data, "smoke_test")
+                    logger.info(f"STEP 4b: Running smoke workflows for {len(class_names)} node classes...")
+                    smoke_results = run_smoke_tests(
+                        f"http://127.0.0.1:{COMFYUI_PORT}", class_names, object_info, SMOKE_TEST_TIMEOUT
+                    )
+                    executed = {k: v for k, v in smoke_results.items() if not v["skipped"]}
+                    # Only a crash in the node's own code fails the node; rejected defaults,
+                    # timeouts and missing files or services are recorded but say nothing certain about it
+                    smoke_failed = [k for k, v in executed.items() if v["failure"] == "execution_error"]
+                    inconclusive = [k for k, v in executed.items() if v["failure"] not in (None, "execution_error")]
+                    result_data["steps"]["smoke_test"]["node_classes"] = smoke_results
+                    result_data["steps"]["smoke_test"]["inconclusive"] = inconclusive
+                    result_data["steps"]["smoke_test"]["success"] = not smoke_failed
+                    if inconclusive:
+                        log_warning(f"{len(inconclusive)} smoke workflows were inconclusive: {', '.join(inconclusive)}")
+                    if smoke_failed:
+                        result_data["steps"]["smoke_test"]["error_message"] = f"Smoke workflows failed for: {', '.join(smoke_failed)}"
+                        log_error(f"{len(smoke_failed)}/{len(executed)} smoke workflows failed: {', '.join(smoke_failed)}")
+                    else:
+                        log_success(f"{len(executed) - len(inconclusive)} smoke workflows passed ({len(smoke_results) - len(executed)} skipped)")
+            else:
+                result_data["steps"]["object_info_check"]["success"] = False
+                result_data["steps"]["object_info_check"]["error_message"] = f"Status code {response.status_code}"
+                log_error(f"Failed to get object_info: Status code {response.status_code}")
+        except Exception as e:
+            result_data["steps"]["object_info_check"]["success"] = False
+            result_data["steps"]["object_info_check"]["error_message"] = str(e)
+            log_error(f"Error checking object_info: {str(e)}")
+        finally:
+            # Cleanup ComfyUI process
+            if comfy_process:
+                log_warning("Terminating ComfyUI server...")
+                comfy_process.terminate()
+                with governor.measure():
+                    comfy_process.wait()
+                log_success("ComfyUI process terminated successfully")
+                comfy_process = None
+
+        # Account for what the node left on disk (models are fetched at import time)
+        node_dirs = sorted(list_custom_node_dirs() - custom_node_dirs_before)
+        result_data["disk_usage"]["node_dirs"] = node_dirs
+        result_data["disk_usage"]["node_repo_bytes"] = sum(
+            disk_usage(os.path.join(COMFYUI_DIR, "custom_nodes", d)) for d in node_dirs
+        )
+        result_data["disk_usage"]["models_added_bytes"] = max(0, disk_usage(models_dir) - models_bytes_before)
+
+        # --------------------------------------------------------------------
+        # STEP 5: Uninstall the custom node
+        # --------------------------------------------------------------------
+        begin_step(result_data, "uninstall_node")
+        logger.info(f"STEP 5: Uninstalling node {node_name}...")
+        cmd_uninstall_node = f"uv run custom_nodes/ComfyUI-Manager/cm-cli.py uninstall {node_name}"
+        rc, out, err = run_cmd(cmd_uninstall_node, cwd=COMFYUI_DIR)
+        if rc == 0:
+            result_data["steps"]["uninstall_node_status"]["success"] = True
+            log_success(f"Node {node_name} uninstalled successfully")
+        else:
+            result_data["steps"]["uninstall_node_status"]["error_message"] = err
+            log_error(f"Failed to uninstall node: {err}")
+        result_data["steps"]["uninstall_node_status"]["uninstall_log"] = out + "\n" + err
+
+        # --------------------------------------------------------------------
+        # Final outcome
+        # --------------------------------------------------------------------
+        if not result_data["steps"]["object_info_check"]["success"]:
+            result_data["final_outcome"] = "FAILED_OBJECT_INFO_CHECK"
+            log_error("Final outcome: FAILED_OBJECT_INFO_CHECK")
+        elif not result_data["steps"]["object_info_check"]["found_in_object_info"]:
+            result_data["final_outcome"] = "FAILED_NODE_NOT_FOUND"
+            log_error("Final outcome: FAILED_NODE_NOT_FOUND")
+        elif result_data["steps"]["smoke_test"]["error_message"]:
+            result_data["final_outcome"] = "FAILED_SMOKE_TEST"
+            log_error("Final outcome: FAILED_SMOKE_TEST")
+        else:   
+            result_data["final_outcome"] = "PASSED"
+            log_success("Final outcome: PASSED")
+
+    except Exception as e:
+        # Catch any unexpected errors to ensure we continue with the next node
+        log_error(f"Unexpected error testing node {node_name}: {str(e)}")
+        result_data["final_outcome"] = "UNEXPECTED_ERROR"
+        result_data["error_message"] = str(e)
+
+    finally:
+        # Always terminate ComfyUI process if it exists
+        if comfy_process is not None:
+            try:
+                log_warning("Terminating ComfyUI server...")
+                comfy_process.terminate()
+                # Add a timeout to wait() to prevent hanging indefinitely
+                with governor.measure():
+                    comfy_process.wait(timeout=10)
+                log_success("ComfyUI process terminated successfully")
+            except subprocess.TimeoutExpired:
+                # If terminate doesn't work, try kill (more forceful)
+                log_error("ComfyUI process didn't terminate, forcing kill...")
+                comfy_process.kill()
+                try:
+                    with governor.measure():
+                        comfy_process.wait(timeout=5)
+                    log_success("ComfyUI process killed successfully")
+                except subprocess.TimeoutExpired:
+                    log_error("Failed to kill ComfyUI process!")
+            except Exception as e:
+                log_error(f"Error while terminating ComfyUI: {str(e)}")
+            comfy_process = None
+
+        result_data["resource_usage"] = governor.usage()
+        governor.close()
+        if result_data["resource_usage"]["limit_exceeded"]:
+            result_data["final_outcome"] = "FAILED_RESOURCE_LIMIT"
+            log_error(f"Final outcome: FAILED_RESOURCE_LIMIT ({result_data['resource_usage']['limit_exceeded']} limit exceeded)")
+        end_step(result_data)
+        close_node_log(result_data["log_id"])
+
+
+    return result_data
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Install custom nodes one by one and check that they load")
+    parser.add_argument("--node-source", nargs="?", const=DEFAULT_SOURCE,
+                        help=f"Load the node list from a registry URL or local JSON file instead of TOP_NODES "
+                             f"(without a value: {DEFAULT_SOURCE})")
+    parser.add_argument("--top", type=int, help="Only test the N most downloaded nodes")
+    parser.add_argument("--include", action="append", default=[], help="Only test node ids matching this pattern (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], help="Skip node ids matching this pattern (repeatable)")
+    parser.add_argument("--min-downloads", type=int, default=0, help="Skip registry nodes with fewer downloads")
+    return parser.parse_args()
+
+def resolve_node_list(args):
+    """
+    Build the list of nodes to test from the command line arguments.
+
+    Registry nodes keep the versions/extras of a TOP_NODES entry with the same id.
+    Without --node-source, or if it cannot be read and nothing is cached,
+    TOP_NODES is used; its ids are looked up in the (cached) registry so that
+    two ids for one repository are only tested once.
+
+    Returns:
+        list: TOP_NODES-style entries, without two ids for the same repository
+    """
+    selection = {"top": args.top, "include": args.include, "exclude": args.exclude, "min_downloads": args.min_downloads}
+    if args.node_source:
+        try:
+            nodes, origin = load_node_list(args.node_source, NODE_LIST_CACHE_DIR, **selection)
+            logger.info(f"Loaded {len(nodes)} nodes from {args.node_source} ({origin})")
+            overrides = {node["id"]: node for node in TOP_NODES}
+            return [dict(overrides.get(node["id"], {}), id=node["id"]) for node in nodes]
+        except (NodeListUnavailable, OSError, ValueError) as e:
+            log_warning(f"{str(e)}; falling back to TOP_NODES")
+
+    try:
+        data, origin = fetch_pages(DEFAULT_SOURCE, NODE_LIST_CACHE_DIR)
+        entries = with_repositories(TOP_NODES, parse_nodes(data))
+        logger.info(f"Resolved TOP_NODES repositories from the registry ({origin})")
+    except (NodeListUnavailable, OSError, ValueError) as e:
+        log_warning(f"Cannot resolve TOP_NODES repositories ({str(e)}); ids of the same repository may be tested twice")
+        entries = TOP_NODES
+    if args.min_downloads:
+        log_warning("TOP_NODES has no download counts; --min-downloads does not filter it")
+    return select_nodes(entries, **selection)
+
+def main():
+    args = parse_args()
+    setup_logging()
+    progress_server = None
+
     try:
         if not os.path.exists(COMFYUI_DIR):
             log_error(f"ComfyUI directory not found at {COMFYUI_DIR}")
@@ -514,189 +1240,58 @@ def main():
             return
 
         results = []
+        nodes = resolve_node_list(args)
+        # Order nodes by the dependency sets earlier runs resolved for them
+        node_ids = list(dict.fromkeys(node["id"] for node in nodes))
+        node_order = node_ids
+        if SCHEDULE_BY_SIMILARITY:
+            requirements = load_requirement_history(os.getcwd())
+            node_order = order_by_similarity(node_ids, requirements)
+            schedule = schedule_report(node_ids, node_order, requirements)
+            # Every cell starts from a pristine venv, so these savings are not realized by this run
+            logger.info(f"Scheduled {len(node_ids)} nodes by dependency similarity; under incremental venv reuse this "
+                        f"order would need {schedule['scheduled_installs']} package installs instead of "
+                        f"{schedule['list_order_installs']} in list order ({schedule['installs_saved']} would be saved, "
+                        f"{len(schedule['nodes_without_history'])} nodes without history run last)")
+        cells = schedule_matrix(expand_matrix(nodes, DEFAULT_TORCH_EXTRA), node_order)
+
+        progress.start_run(
+            [(cell_id(cell["id"], cell["version"], cell["extra"]), cell["id"]) for cell in cells],
+            load_duration_history(os.getcwd())
+        )
+        if PROGRESS_PORT is not None:
+            try:
+                progress_server = start_progress_server(progress, PROGRESS_HOST, PROGRESS_PORT)
+                logger.info(f"Progress: http://{PROGRESS_HOST}:{PROGRESS_PORT}/status and /metrics")
+            except OSError as e:
+                log_warning(f"Progress endpoint disabled, cannot listen on port {PROGRESS_PORT}: {str(e)}")
+        extras = list(dict.fromkeys(cell["extra"] for cell in cells))
+
+        # Garbage-collect CI caches down to their budgets, keeping what this run needs
+        protected_paths = [os.path.join(COMFYUI_DIR, ".venv"), COMFYUI_MANAGER_DIR, NODE_LOG_DIR, log_filename]
+        protected_paths += [env_cache_path(extra) for extra in extras]
+        gc_report = collect_garbage(COMFYUI_DIR, os.getcwd(), CI_CACHE_DIR, CACHE_BUDGETS, protected_paths)
+        freed = gc_report["before"]["total_bytes"] - gc_report["after"]["total_bytes"]
+        logger.info(f"Disk usage: {format_bytes(gc_report['after']['total_bytes'])} "
+                    f"(evicted {len(gc_report['evicted'])} artifacts, freed {format_bytes(freed)})")
+        for artifact_class, usage in gc_report["after"]["by_class"].items():
+            logger.info(f"  {artifact_class}: {format_bytes(usage['bytes'])} / {format_bytes(CACHE_BUDGETS[artifact_class])}")
+        mark_used(protected_paths, CI_CACHE_DIR)
         
-        logger.info(f"Starting test of {len(TOP_NODES)} custom nodes...")
+        logger.info(f"Starting test of {len(nodes)} custom nodes "
+                    f"({len(cells)} node/version/extra combinations, torch extras: {', '.join(extras)})...")
         logger.info(f"ComfyUI directory: {COMFYUI_DIR}")
         logger.info(f"ComfyUI port: {COMFYUI_PORT}")
         log_separator()
 
-        for i, node in enumerate(TOP_NODES):
-            node_name = node["id"]
-            log_colored(f"\n[{i+1}/{len(TOP_NODES)}] Testing node: {node_name}", Fore.CYAN)
+        for i, cell in enumerate(cells):
+            log_colored(f"\n[{i+1}/{len(cells)}] Testing node: {cell['id']} "
+                        f"(version: {cell['version']}, torch extra: {cell['extra']})", Fore.CYAN)
             log_separator("=")
-            
-            result_data = create_json_result_template(node_name)
-            # Define comfy_process at the beginning of the loop
-            comfy_process = None
-
-            try:
-                # --------------------------------------------------------------------
-                # STEP 1: Freeze the requirements.txt (before installing node)
-                # --------------------------------------------------------------------
-                logger.info(f"STEP 1: Reset the pip environment before installing {node_name}...")
-               
-                # Before running UV_SYNC_CMD, remove the .venv folder if it exists
-                venv_path = os.path.join(COMFYUI_DIR, '.venv')
-                if os.path.exists(venv_path):
-                    shutil.rmtree(venv_path)
-                    print(f"Removed existing .venv folder at {venv_path}")
-
-                # Now run the sync command to recreate the environment
-                rc, out, err = run_cmd(UV_SYNC_CMD, cwd=COMFYUI_DIR, env={"VIRTUAL_ENV": COMFYUI_DIR})
-                log_warning(f"Reset venv output: {out} {rc}")
-                if rc == 0:
-                    result_data["steps"]["reset_venv"]["success"] = True
-                else:
-                    result_data["steps"]["reset_venv"]["error_message"] = err
-                    result_data["final_outcome"] = "FAILED_RESET_VENV"
-                    log_fatal(f"Failed to reset venv: {err}")
-                    results.append(result_data)
-                    continue
-
-                # --------------------------------------------------------------------
-                # STEP 2: Install the custom node using Manager
-                # --------------------------------------------------------------------
-                logger.info(f"STEP 2: Installing node {node_name}...")
-                cmd_install_node = f"{VENV_PYTHON} custom_nodes/ComfyUI-Manager/cm-cli.py install {node_name}"
-                rc, out, err = run_cmd(cmd_install_node, cwd=COMFYUI_DIR)
-                if rc == 0:
-                    result_data["steps"]["install_node_status"]["success"] = True
-                    log_success(f"Node {node_name} installed successfully")
-                else:
-                    result_data["steps"]["install_node_status"]["error_message"] = err
-                    result_data["final_outcome"] = "FAILED_INSTALL_NODE"
-                    log_error(f"Failed to install node: {err}")
-                    results.append(result_data)
-                    continue
-                result_data["steps"]["install_node_status"]["install_log"] = out + "\n" + err
-
-                # --------------------------------------------------------------------
-                # STEP 3: Start ComfyUI and wait for it to be ready
-                # --------------------------------------------------------------------
-                logger.info("STEP 3: Starting ComfyUI server...")
-                cmd_start_comfyui = "uv run main.py"
-                comfy_process = subprocess.Popen(cmd_start_comfyui.split(), cwd=COMFYUI_DIR)
-                
-                # Wait for ComfyUI to start (max 60 seconds)
-                start_time = time.time()
-                server_ready = False
-                log_warning("Waiting for ComfyUI server to start (timeout: 60s)...")
-                while time.time() - start_time < 60:
-                    try:
-                        response = requests.get("http://127.0.0.1:8188/queue", timeout=1)
-                        if response.status_code == 200:
-                            server_ready = True
-                            log_success(f"ComfyUI server started after {int(time.time() - start_time)} seconds")
-                            break
-                    except requests.exceptions.RequestException:
-                        time.sleep(1)
-                        continue
-
-                if server_ready:
-                    result_data["steps"]["restart_comfyui_status"]["success"] = True
-                else:
-                    result_data["steps"]["restart_comfyui_status"]["error_message"] = "Server failed to start within 60 seconds"
-                    result_data["final_outcome"] = "FAILED_START_COMFY"
-                    log_error("ComfyUI server failed to start within timeout period")
-                    if comfy_process:
-                        comfy_process.terminate()
-                        comfy_process.wait()
-                        log_success("ComfyUI process terminated successfully")
-                        comfy_process = None
-                        
-                    results.append(result_data)
-                    continue
-
-                # --------------------------------------------------------------------
-                # STEP 4: Check object_info to verify custom node installation
-                # --------------------------------------------------------------------
-                logger.info(f"STEP 4: Checking if node {node_name} is properly installed...")
-                try:
-                    response = requests.get(f"http://127.0.0.1:{COMFYUI_PORT}/object_info", timeout=5)
-                    if response.status_code == 200:
-                        object_info = response.json()
-                        found, details = check_node_in_object_info(node_name, object_info)
-                        result_data["steps"]["object_info_check"]["success"] = True
-                        result_data["steps"]["object_info_check"]["found_in_object_info"] = found
-                        result_data["steps"]["object_info_check"]["object_info_details"] = details
-                        
-                        if found:
-                            log_success(f"Node {node_name} found in object_info")
-                        else:
-                            log_error(f"Node {node_name} NOT found in object_info")
-                    else:
-                        result_data["steps"]["object_info_check"]["success"] = False
-                        result_data["steps"]["object_info_check"]["error_message"] = f"Status code {response.status_code}"
-                        log_error(f"Failed to get object_info: Status code {response.status_code}")
-                except Exception as e:
-                    result_data["steps"]["object_info_check"]["success"] = False
-                    result_data["steps"]["object_info_check"]["error_message"] = str(e)
-                    log_error(f"Error checking object_info: {str(e)}")
-                finally:
-                    # Cleanup ComfyUI process
-                    if comfy_process:
-                        log_warning("Terminating ComfyUI server...")
-                        comfy_process.terminate()
-                        comfy_process.wait()
-                        log_success("ComfyUI process terminated successfully")
-                        comfy_process = None
-
-                # --------------------------------------------------------------------
-                # STEP 5: Uninstall the custom node
-                # --------------------------------------------------------------------
-                logger.info(f"STEP 5: Uninstalling node {node_name}...")
-                cmd_uninstall_node = f"uv run custom_nodes/ComfyUI-Manager/cm-cli.py uninstall {node_name}"
-                rc, out, err = run_cmd(cmd_uninstall_node, cwd=COMFYUI_DIR)
-                if rc == 0:
-                    result_data["steps"]["uninstall_node_status"]["success"] = True
-                    log_success(f"Node {node_name} uninstalled successfully")
-                else:
-                    result_data["steps"]["uninstall_node_status"]["error_message"] = err
-                    log_error(f"Failed to uninstall node: {err}")
-                result_data["steps"]["uninstall_node_status"]["uninstall_log"] = out + "\n" + err
-
-                # --------------------------------------------------------------------
-                # Final outcome
-                # --------------------------------------------------------------------
-                if not result_data["steps"]["object_info_check"]["success"]:
-                    result_data["final_outcome"] = "FAILED_OBJECT_INFO_CHECK"
-                    log_error("Final outcome: FAILED_OBJECT_INFO_CHECK")
-                elif not result_data["steps"]["object_info_check"]["found_in_object_info"]:
-                    result_data["final_outcome"] = "FAILED_NODE_NOT_FOUND"
-                    log_error("Final outcome: FAILED_NODE_NOT_FOUND")
-                else:   
-                    result_data["final_outcome"] = "PASSED"
-                    log_success("Final outcome: PASSED")
-
-            except Exception as e:
-                # Catch any unexpected errors to ensure we continue with the next node
-                log_error(f"Unexpected error testing node {node_name}: {str(e)}")
-                result_data["final_outcome"] = "UNEXPECTED_ERROR"
-                result_data["error_message"] = str(e)
-            
-            finally:
-                # Always terminate ComfyUI process if it exists
-                if comfy_process is not None:
-                    try:
-                        log_warning("Terminating ComfyUI server...")
-                        comfy_process.terminate()
-                        # Add a timeout to wait() to prevent hanging indefinitely
-                        comfy_process.wait(timeout=10)
-                        log_success("ComfyUI process terminated successfully")
-                    except subprocess.TimeoutExpired:
-                        # If terminate doesn't work, try kill (more forceful)
-                        log_error("ComfyUI process didn't terminate, forcing kill...")
-                        comfy_process.kill()
-                        try:
-                            comfy_process.wait(timeout=5)
-                            log_success("ComfyUI process killed successfully")
-                        except subprocess.TimeoutExpired:
-                            log_error("Failed to kill ComfyUI process!")
-                    except Exception as e:
-                        log_error(f"Error while terminating ComfyUI: {str(e)}")
-                    comfy_process = None
-
-            # Add to overall results
+            progress.start_cell(cell_id(cell["id"], cell["version"], cell["extra"]), cell["id"])
+            # run_node_test() always stops the node's ComfyUI server, even on KeyboardInterrupt
+            result_data = run_node_test(cell["id"], cell["version"], cell["extra"])
+            progress.finish_cell(result_data)
             results.append(result_data)
             log_separator()
 
@@ -708,6 +1303,15 @@ def main():
         with open(out_filename, "w", encoding="utf-8") as f:
             json.dump(results, f, indent=2)
 
+        usage_filename = f"comfyui_disk_usage_{timestamp}.json"
+        with open(usage_filename, "w", encoding="utf-8") as f:
+            json.dump({
+                "before_gc": gc_report["before"],
+                "after_gc": gc_report["after"],
+                "evicted": gc_report["evicted"],
+                "by_node": {r["cell_id"]: r["disk_usage"] for r in results}
+            }, f, indent=2)
+
         # Print summary
         logger.info("\nTest Summary:")
         log_separator("=")
@@ -716,26 +1320,38 @@ def main():
         logger.info(f"Total nodes tested: {len(results)}")
         log_colored(f"Passed: {passed}", Fore.GREEN)
         log_colored(f"Failed: {failed}", Fore.RED)
+        for r in results:
+            if r["final_outcome"] != "PASSED":
+                log_error(f"{r['cell_id']}: {r['final_outcome']}")
         logger.info(f"Test results saved to {out_filename}")
+        logger.info(f"Disk usage report saved to {usage_filename}")
+
+        # Rank nodes by how much they add to the environment
+        footprint_ranking = rank_footprints(results)
+        footprint_filename = f"comfyui_footprint_report_{timestamp}.json"
+        with open(footprint_filename, "w", encoding="utf-8") as f:
+            json.dump(footprint_ranking, f, indent=2)
+        logger.info("\nLargest environment footprints:")
+        for entry in footprint_ranking[:10]:
+            key_changes = ", ".join(
+                f"{name} {change['before']} -> {change['after'] or 'removed'}"
+                for name, change in entry["key_package_changes"].items()
+            )
+            logger.info(f"  {cell_id(entry['node_name'], entry['version'], entry['extra'])}: {format_bytes(entry['bytes_added'])} on disk, "
+                        f"{format_bytes(entry['download_bytes'])} downloaded, {entry['packages_added']} packages added"
+                        + (f", built from source: {', '.join(entry['built_from_source'])}" if entry["built_from_source"] else "")
+                        + (f", {key_changes}" if key_changes else ""))
+        logger.info(f"Footprint report saved to {footprint_filename}")
 
     except KeyboardInterrupt:
         log_warning("Script interrupted by user")
     except Exception as e:
         log_error(f"Unexpected error in main: {str(e)}")
     finally:
-        # Final cleanup in case of unexpected exit from the main loop
-        if comfy_process is not None:
-            try:
-                log_warning("Terminating ComfyUI server (final cleanup)...")
-                comfy_process.terminate()
-                comfy_process.wait(timeout=10)
-            except:
-                try:
-                    comfy_process.kill()
-                    comfy_process.wait(timeout=5)
-                    log_success("ComfyUI process killed successfully")
-                except:
-                    log_error("Failed to terminate ComfyUI in final cleanup")
+        if progress_server is not None:
+            progress_server.shutdown()
+            progress_server.server_close()
+        shutdown_logging()
 
 if __name__ == "__main__":
     main()
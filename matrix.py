@@ -0,0 +1,72 @@
+"""
+Expansion of TOP_NODES into a test matrix.
+
+A TOP_NODES entry may list "versions" (latest, nightly or pinned registry
+versions) and "extras" (torch extras for uv sync, such as cpu or cu126):
+
+    {"id": "comfyui-impact-pack", "versions": ["latest", "nightly", "8.8.1"], "extras": ["cpu"]}
+
+Every (node, version, extra) combination is one cell, tested like a single
+node in a plain run. Cells are scheduled so that those sharing a base
+environment run back to back and the environment is built once per extra.
+"""
+
+DEFAULT_VERSION = "latest"
+
+
+def expand_matrix(nodes, default_extra):
+    """
+    Expand TOP_NODES entries into matrix cells.
+
+    Args:
+        nodes: TOP_NODES entries with "id" and optional "versions" and "extras"
+        default_extra: Torch extra for entries without "extras"
+
+    Returns:
+        list: Dicts with id, version and extra, without duplicates, in list order
+    """
+    cells = []
+    seen = set()
+    for node in nodes:
+        for version in node.get("versions") or [DEFAULT_VERSION]:
+            for extra in node.get("extras") or [default_extra]:
+                key = (node["id"], str(version), extra)
+                if key in seen:
+                    continue
+                seen.add(key)
+                cells.append({"id": node["id"], "version": str(version), "extra": extra})
+    return cells
+
+
+def schedule_matrix(cells, node_order=()):
+    """
+    Order cells so the ones sharing a base environment (same extra) run
+    together, with each node's versions consecutive within that group.
+
+    Args:
+        cells: Cells from expand_matrix()
+        node_order: Optional node ids in the order to run them within each
+            extra (see scheduler.py); other nodes follow in first-seen order
+    """
+    extra_order = {}
+    node_order = {node_id: i for i, node_id in enumerate(node_order)}
+    for cell in cells:
+        extra_order.setdefault(cell["extra"], len(extra_order))
+        node_order.setdefault(cell["id"], len(node_order))
+    # sorted() is stable, so versions stay in the order they were listed
+    return sorted(cells, key=lambda cell: (extra_order[cell["extra"]], node_order[cell["id"]]))
+
+
+def install_spec(node_id, version):
+    """Return the cm-cli install argument for a node version."""
+    return node_id if version == DEFAULT_VERSION else f"{node_id}@{version}"
+
+
+def cell_id(node_id, version, extra):
+    """Identify a matrix cell in logs and reports, e.g. "comfyui-impact-pack@nightly+cpu"."""
+    return f"{node_id}@{version}+{extra}"
+
+
+def result_key(result_data):
+    """Key a result by (node, version, extra); results from before the matrix count as latest."""
+    return (result_data["node_name"], result_data.get("version", DEFAULT_VERSION), result_data.get("extra"))
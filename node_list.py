@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+The list of custom nodes to test, loaded from the registry.
+
+The source is the Comfy registry API, any URL returning the same JSON, or a
+local JSON file. Accepted formats are a registry response ({"nodes": [...]}),
+a ComfyUI-Manager list ({"custom_nodes": [...]}) or a plain list of node
+dicts; each node needs an "id" and may have "repository" and "downloads".
+
+Paged registry responses ("totalPages") are followed, since the registry
+does not order nodes by downloads. Remote sources are cached on disk per page
+and revalidated with ETag/Last-Modified, so an unchanged list is not
+downloaded again. If the source cannot be
+reached, the cached copy is used; main.py falls back to TOP_NODES if there
+is none.
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+import requests
+
+DEFAULT_SOURCE = "https://api.comfy.org/nodes?page=1&limit=500"
+DEFAULT_CACHE_DIR = os.path.abspath("./.ci_cache/node_list")
+
+
+class NodeListUnavailable(Exception):
+    """Raised when the source cannot be read and nothing is cached"""
+
+
+def _cache_paths(source, cache_dir):
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{digest}.json"), os.path.join(cache_dir, f"{digest}.meta.json")
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_source(source, cache_dir=DEFAULT_CACHE_DIR, timeout=30):
+    """
+    Read the node list source, going through the on-disk cache for URLs.
+
+    Returns:
+        tuple: (data, origin) - origin is "file", "downloaded", "not-modified" or "offline-cache"
+    """
+    if not source.startswith(("http://", "https://")):
+        path = source[len("file://"):] if source.startswith("file://") else source
+        return _read_json(path), "file"
+
+    body_path, meta_path = _cache_paths(source, cache_dir)
+    meta = {}
+    if os.path.exists(body_path):
+        try:
+            meta = _read_json(meta_path)
+        except (OSError, ValueError):
+            meta = {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = requests.get(source, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return _read_json(body_path), "not-modified"
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if os.path.exists(body_path):
+            return _read_json(body_path), "offline-cache"
+        raise NodeListUnavailable(f"Cannot load node list from {source}: {str(e)}")
+
+    _write_json(body_path, data)
+    _write_json(meta_path, {
+        "source": source,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched": time.time()
+    })
+    return data, "downloaded"
+
+
+def _page_url(source, page):
+    parts = urllib.parse.urlsplit(source)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query) if key != "page"]
+    query.append(("page", str(page)))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def fetch_pages(source, cache_dir=DEFAULT_CACHE_DIR, timeout=30):
+    """
+    Read a source like fetch_source(), following all pages of a paged registry response.
+
+    Returns:
+        tuple: (data, origin) - origin is "offline-cache" if any page came from the
+            cache without revalidation, else "downloaded" if any page changed
+    """
+    data, origin = fetch_source(source, cache_dir, timeout)
+    total_pages = data.get("totalPages") if isinstance(data, dict) else None
+    if not isinstance(total_pages, int) or total_pages <= 1 or not source.startswith(("http://", "https://")):
+        return data, origin
+
+    origins = {origin}
+    nodes = list(data.get("nodes", []))
+    for page in range(int(data.get("page") or 1) + 1, total_pages + 1):
+        page_data, page_origin = fetch_source(_page_url(source, page), cache_dir, timeout)
+        origins.add(page_origin)
+        nodes.extend(page_data.get("nodes", []))
+    for candidate in ("offline-cache", "downloaded"):
+        if candidate in origins:
+            origin = candidate
+            break
+    return dict(data, nodes=nodes, page=1, totalPages=1), origin
+
+
+def parse_nodes(data):
+    """Extract [{"id", "repository", "downloads"}] from any supported source format; downloads is None if unknown."""
+    if isinstance(data, dict):
+        data = data.get("nodes", data.get("custom_nodes", []))
+    nodes = []
+    for entry in data:
+        if not isinstance(entry, dict) or not entry.get("id"):
+            continue
+        nodes.append({
+            "id": entry["id"],
+            "repository": entry.get("repository") or entry.get("reference") or "",
+            "downloads": entry.get("downloads")
+        })
+    return nodes
+
+
+def normalize_repository(url):
+    """Reduce a repository URL to host/owner/name so clones of the same repo compare equal."""
+    url = url.strip().lower()
+    if url.startswith("git@"):
+        url = url[len("git@"):].replace(":", "/", 1)
+    for prefix in ("https://", "http://", "git://", "ssh://"):
+        if url.startswith(prefix):
+            url = url[len(prefix):]
+    if url.startswith("www."):
+        url = url[len("www."):]
+    url = url.rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-len(".git")]
+    return url
+
+
+def select_nodes(nodes, top=None, include=(), exclude=(), min_downloads=0):
+    """
+    Pick the nodes to test, most downloaded first.
+
+    Args:
+        nodes: Dicts with id and optional repository and downloads
+        top: Keep at most this many nodes
+        include: fnmatch patterns; if given, only matching ids are kept
+        exclude: fnmatch patterns of ids to drop
+        min_downloads: Popularity cutoff; entries without a download count (TOP_NODES) are kept
+
+    Returns:
+        list: Selected nodes; of several ids for one repository only the most downloaded is kept
+    """
+    selected = []
+    seen_repositories = set()
+    # sorted() is stable, so sources without download counts keep their order
+    for node in sorted(nodes, key=lambda n: n.get("downloads") or 0, reverse=True):
+        if include and not any(fnmatch.fnmatch(node["id"], pattern) for pattern in include):
+            continue
+        if any(fnmatch.fnmatch(node["id"], pattern) for pattern in exclude):
+            continue
+        if node.get("downloads") is not None and node["downloads"] < min_downloads:
+            continue
+        repository = normalize_repository(node.get("repository") or "") or node["id"]
+        if repository in seen_repositories:
+            continue
+        seen_repositories.add(repository)
+        selected.append(node)
+        if top is not None and len(selected) >= top:
+            break
+    return selected
+
+
+def with_repositories(entries, registry_nodes):
+    """
+    Fill in the repository of TOP_NODES-style entries from registry data, so
+    select_nodes() can drop ids that point at the same repository.
+
+    Returns:
+        list: Copies of the entries; ids unknown to the registry are left as they are
+    """
+    repositories = {node["id"]: node["repository"] for node in registry_nodes if node.get("repository")}
+    return [
+        dict(entry, repository=repositories[entry["id"]])
+        if not entry.get("repository") and entry["id"] in repositories else entry
+        for entry in entries
+    ]
+
+
+def load_node_list(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR, **selection):
+    """
+    Load and select the node list; keyword arguments are passed to select_nodes().
+
+    Returns:
+        tuple: (list, str) - (nodes, origin as in fetch_source())
+    """
+    data, origin = fetch_pages(source, cache_dir)
+    return select_nodes(parse_nodes(data), **selection), origin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the custom nodes a sweep would test")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Registry URL or local JSON file")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cache directory for remote sources")
+    parser.add_argument("--top", type=int, help="Only the N most downloaded nodes")
+    parser.add_argument("--include", action="append", default=[], help="Only node ids matching this pattern (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], help="Skip node ids matching this pattern (repeatable)")
+    parser.add_argument("--min-downloads", type=int, default=0, help="Skip nodes with fewer downloads")
+    parser.add_argument("--json", action="store_true", help="Print the list as JSON")
+    args = parser.parse_args()
+
+    try:
+        nodes, origin = load_node_list(
+            args.source, args.cache_dir, top=args.top, include=args.include,
+            exclude=args.exclude, min_downloads=args.min_downloads
+        )
+    except (NodeListUnavailable, OSError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(nodes, indent=2))
+    else:
+        for node in nodes:
+            downloads = "-" if node["downloads"] is None else node["downloads"]
+            print(f"{node['id']:<50} {downloads:>10} {node['repository']}")
+        print(f"{len(nodes)} nodes ({origin})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Live progress of a run, served over HTTP.
+
+main.py reports cell and step transitions to a ProgressTracker. A small
+ThreadingHTTPServer on a daemon thread serves it as Prometheus text at
+/metrics and as JSON at /status. The orchestrator only ever takes the
+tracker's lock for a few assignments; rendering works on a copy taken under
+the lock, so a slow or stuck client can never hold up a node test.
+
+The ETA uses each remaining node's duration from earlier results files,
+falling back to the mean duration of the cells finished so far.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scheduler import RESULTS_PATTERN
+
+# Upper bounds (seconds) of the step duration histogram buckets
+DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def load_duration_history(work_dir, max_files=10):
+    """
+    Collect how long each node took in the newest results files.
+
+    Returns:
+        dict: {cell id or node id: seconds}; a node id maps to its newest cell
+    """
+    paths = sorted(glob.glob(os.path.join(work_dir, RESULTS_PATTERN)), reverse=True)[:max_files]
+    durations = {}
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for result_data in results:
+            seconds = sum(result_data.get("step_timings", {}).values())
+            if not seconds:
+                continue
+            for key in (result_data.get("cell_id"), result_data["node_name"]):
+                if key and key not in durations:
+                    durations[key] = seconds
+    return durations
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class ProgressTracker:
+    """Thread-safe state of the running sweep"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.run_started = None
+        self.cells = []
+        self.history = {}
+        self.completed = 0
+        self.passed = 0
+        self.failed = 0
+        self.cell_durations = []
+        self.current_cell = None
+        self.current_node = None
+        self.current_step = None
+        self.cell_started = None
+        self.step_started = None
+        # {step: {"buckets": [count per DURATION_BUCKETS], "sum": seconds, "count": n}}
+        self.step_durations = {}
+
+    def start_run(self, cells, history=None):
+        """
+        Args:
+            cells: (cell id, node id) tuples in the order they will run
+            history: {cell id or node id: seconds} from load_duration_history()
+        """
+        with self._lock:
+            self.run_started = time.time()
+            self.cells = list(cells)
+            self.history = dict(history or {})
+
+    def start_cell(self, cell_id, node_id):
+        with self._lock:
+            self.current_cell, self.current_node = cell_id, node_id
+            self.current_step = None
+            self.cell_started = time.time()
+
+    def set_step(self, step):
+        with self._lock:
+            self.current_step = step
+            self.step_started = time.time() if step else None
+
+    def finish_cell(self, result_data):
+        """Count a finished cell and add its step timings to the histogram."""
+        with self._lock:
+            self.completed += 1
+            if result_data["final_outcome"] == "PASSED":
+                self.passed += 1
+            else:
+                self.failed += 1
+            if self.cell_started is not None:
+                self.cell_durations.append(time.time() - self.cell_started)
+            for step, seconds in result_data.get("step_timings", {}).items():
+                entry = self.step_durations.setdefault(
+                    step, {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+                )
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    if seconds <= bound:
+                        entry["buckets"][i] += 1
+                entry["sum"] += seconds
+                entry["count"] += 1
+            self.current_cell = self.current_node = self.current_step = None
+            self.cell_started = self.step_started = None
+
+    def status(self, now=None):
+        """
+        Snapshot the progress.
+
+        Returns:
+            dict: Counts, current cell/step, step histogram and eta_seconds (None if unknown)
+        """
+        now = now or time.time()
+        with self._lock:
+            cells = list(self.cells)
+            completed, passed, failed = self.completed, self.passed, self.failed
+            current_cell, current_node, current_step = self.current_cell, self.current_node, self.current_step
+            cell_started, step_started, run_started = self.cell_started, self.step_started, self.run_started
+            cell_durations = list(self.cell_durations)
+            history = self.history
+            step_durations = {step: dict(entry, buckets=list(entry["buckets"])) for step, entry in self.step_durations.items()}
+
+        if cell_durations:
+            fallback = sum(cell_durations) / len(cell_durations)
+        elif history:
+            fallback = sum(history.values()) / len(history)
+        else:
+            fallback = None
+
+        def expected_seconds(cell_id, node_id):
+            return history.get(cell_id, history.get(node_id, fallback))
+
+        # Cells still to run after the current one
+        remaining = cells[completed + (1 if current_cell else 0):]
+        eta = 0.0
+        for cell_id, node_id in remaining:
+            expected = expected_seconds(cell_id, node_id)
+            if expected is None:
+                eta = None
+                break
+            eta += expected
+        if eta is not None and current_cell:
+            expected = expected_seconds(current_cell, current_node)
+            if expected is None:
+                eta = None
+            else:
+                eta += max(0.0, expected - (now - cell_started))
+
+        return {
+            "total": len(cells),
+            "completed": completed,
+            "passed": passed,
+            "failed": failed,
+            "current_cell": current_cell,
+            "current_node": current_node,
+            "current_step": current_step,
+            "cell_elapsed_seconds": now - cell_started if cell_started else None,
+            "step_elapsed_seconds": now - step_started if step_started else None,
+            "run_elapsed_seconds": now - run_started if run_started else None,
+            "eta_seconds": eta,
+            "step_durations": step_durations
+        }
+
+    def render_metrics(self, now=None):
+        """Render the status in the Prometheus text exposition format."""
+        status = self.status(now)
+        lines = []
+
+        def sample(name, labels, value):
+            label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                sample(name, labels, value)
+
+        # The _total suffix is reserved for counters
+        metric("node_ci_cells", "gauge", "Node/version/extra combinations in this run", [((), status["total"])])
+        metric("node_ci_cells_completed_total", "counter", "Combinations tested so far", [((), status["completed"])])
+        metric("node_ci_cells_passed_total", "counter", "Combinations that passed", [((), status["passed"])])
+        metric("node_ci_cells_failed_total", "counter", "Combinations that failed", [((), status["failed"])])
+        if status["eta_seconds"] is not None:
+            metric("node_ci_eta_seconds", "gauge", "Estimated seconds until the run finishes", [((), round(status["eta_seconds"], 1))])
+        if status["current_cell"]:
+            metric("node_ci_current_step", "gauge", "Combination and step being tested", [(
+                (("cell", status["current_cell"]), ("node", status["current_node"]), ("step", status["current_step"] or "")), 1
+            )])
+
+        name = "node_ci_step_duration_seconds"
+        metric(name, "histogram", "Duration of pipeline steps", [])
+        for step, entry in sorted(status["step_durations"].items()):
+            for bound, count in zip(DURATION_BUCKETS, entry["buckets"]):
+                sample(f"{name}_bucket", (("step", step), ("le", bound)), count)
+            sample(f"{name}_bucket", (("step", step), ("le", "+Inf")), entry["count"])
+            sample(f"{name}_sum", (("step", step),), round(entry["sum"], 3))
+            sample(f"{name}_count", (("step", step),), entry["count"])
+        return "\n".join(lines) + "\n"
+
+
+class _ProgressHandler(BaseHTTPRequestHandler):
+    tracker = None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = self.tracker.render_metrics(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path in ("/", "/status"):
+            body, content_type = json.dumps(self.tracker.status(), indent=2), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Requests must not end up in the run's console or log files
+        pass
+
+
+def start_progress_server(tracker, host="127.0.0.1", port=9188):
+    """
+    Serve a tracker on a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: Call shutdown() to stop it; server_address has the bound port
+    """
+    handler = type("ProgressHandler", (_ProgressHandler,), {"tracker": tracker})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="progress-server", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,342 @@
+"""
+Per-node resource limits for the processes a node test starts.
+
+Some custom nodes download models or spin up heavy threads at import time. The
+governor caps CPU, memory and process count of everything a node's install and
+server commands start, and reports what they actually used.
+
+On Linux with a writable cgroup v2 hierarchy each node gets its own cgroup
+(memory.max, cpu.max, pids.max) and usage is read from the cgroup's stat files.
+Elsewhere it falls back to soft shell rlimits (ulimit -S), clamped to the
+inherited hard limits. These are coarser: memory and CPU time are per
+process, and RLIMIT_NPROC counts every process of the user, not just the
+node's. On Windows commands run unchanged.
+
+Commands are confined by wrapping them in a small shell prelude, so nothing
+runs in a preexec_fn while the logging thread is alive. A prelude step that
+fails prints a warning to stderr, and the command still runs.
+"""
+import contextlib
+import os
+import re
+import shlex
+import signal
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_CONTROLLERS = ("cpu", "memory", "pids", "io")
+
+# Signals a process gets when it runs into an rlimit
+RLIMIT_SIGNALS = {
+    getattr(signal, "SIGXCPU", None): "cpu",
+    getattr(signal, "SIGXFSZ", None): "disk"
+}
+
+# Messages Python and the C runtime print when an allocation or fork is refused
+LIMIT_PATTERNS = (
+    (re.compile(r"MemoryError|Cannot allocate memory|std::bad_alloc|out of memory", re.IGNORECASE), "memory"),
+    (re.compile(r"can't start new thread|Resource temporarily unavailable", re.IGNORECASE), "pids")
+)
+
+# dash (Debian's /bin/sh) calls the process limit -p, bash and busybox call it -u
+NPROC_ULIMIT_FLAG = "-p" if os.path.basename(os.path.realpath("/bin/sh")) == "dash" else "-u"
+
+_cgroup_base = None
+
+
+def _clamp_to_hard_limit(value, rlimit_name, unit=1):
+    """
+    Clamp a limit to the inherited hard limit, which an unprivileged process cannot raise.
+
+    Args:
+        value: The configured limit, in the resource's own unit (bytes, processes, seconds)
+        rlimit_name: Name of the resource module constant, e.g. "RLIMIT_NPROC"
+        unit: What one `ulimit` step is worth (1024 for ulimit's kilobytes)
+
+    Returns:
+        int: The value to pass to ulimit
+    """
+    value = int(value) // unit
+    rlimit = getattr(resource, rlimit_name, None)
+    if rlimit is None:
+        return value
+    hard = resource.getrlimit(rlimit)[1]
+    if hard == resource.RLIM_INFINITY:
+        return value
+    return min(value, hard // unit)
+
+
+def _own_cgroup_dir():
+    """Return the cgroup v2 directory of this process, or None without a unified hierarchy."""
+    if not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        return None
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return os.path.join(CGROUP_ROOT, line.strip()[3:].lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def _read_keyed(path):
+    """Parse flat-keyed cgroup files like memory.events or cpu.stat."""
+    values = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    values[parts[0]] = int(parts[1])
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def get_cgroup_base():
+    """
+    Prepare a cgroup under which per-node cgroups can be created.
+
+    cgroup v2 only lets leaf cgroups hold processes once controllers are
+    delegated, so the orchestrator first moves itself into an "orchestrator"
+    child, then enables the controllers for its siblings.
+
+    Returns:
+        str or None: Directory for node cgroups, or None if cgroups cannot be used
+    """
+    global _cgroup_base
+    if _cgroup_base is not None:
+        return _cgroup_base or None
+
+    _cgroup_base = ""
+    base = _own_cgroup_dir()
+    if base is None or not os.access(base, os.W_OK):
+        return None
+    try:
+        with open(os.path.join(base, "cgroup.controllers"), "r") as f:
+            available = f.read().split()
+        controllers = [c for c in CGROUP_CONTROLLERS if c in available]
+        if "memory" not in controllers or "pids" not in controllers:
+            return None
+
+        orchestrator = os.path.join(base, "orchestrator")
+        os.makedirs(orchestrator, exist_ok=True)
+        _write(os.path.join(orchestrator, "cgroup.procs"), str(os.getpid()))
+        _write(os.path.join(base, "cgroup.subtree_control"), " ".join(f"+{c}" for c in controllers))
+    except OSError:
+        return None
+
+    _cgroup_base = base
+    return base
+
+
+class ResourceGovernor:
+    """Confines and measures the processes started for one node"""
+
+    def __init__(self, node_id, limits, use_cgroup=True):
+        """
+        Args:
+            node_id: The node being tested, used to name its cgroup
+            limits: Dict with optional memory_bytes, cpu_cores, pids and cpu_seconds
+            use_cgroup: Set to False to force the rlimit fallback
+        """
+        self.node_id = node_id
+        self.limits = limits
+        self.cgroup_dir = None
+        self.limit_exceeded = None
+        self.backend = "none"
+
+        if sys.platform == "win32":
+            return
+        base = get_cgroup_base() if use_cgroup else None
+        if base:
+            try:
+                self.cgroup_dir = self._create_cgroup(base)
+                self.backend = "cgroup"
+            except OSError:
+                self.cgroup_dir = None
+        if self.cgroup_dir is None and resource is not None:
+            self.backend = "rlimit"
+            # Summed over the governed commands only, see measure()
+            self._rusage = {"cpu_seconds": 0.0, "io_read_bytes": 0, "io_write_bytes": 0, "peak_memory_bytes": None}
+
+    def _create_cgroup(self, base):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", self.node_id)
+        cgroup_dir = os.path.join(base, f"node-{safe_name}-{os.getpid()}")
+        os.makedirs(cgroup_dir, exist_ok=True)
+        if self.limits.get("memory_bytes"):
+            _write(os.path.join(cgroup_dir, "memory.max"), str(self.limits["memory_bytes"]))
+            # Do not let the kernel push the node into swap instead of failing it
+            if os.path.exists(os.path.join(cgroup_dir, "memory.swap.max")):
+                _write(os.path.join(cgroup_dir, "memory.swap.max"), "0")
+        if self.limits.get("cpu_cores") and os.path.exists(os.path.join(cgroup_dir, "cpu.max")):
+            period = 100000
+            _write(os.path.join(cgroup_dir, "cpu.max"), f"{int(self.limits['cpu_cores'] * period)} {period}")
+        if self.limits.get("pids"):
+            _write(os.path.join(cgroup_dir, "pids.max"), str(self.limits["pids"]))
+        return cgroup_dir
+
+    def wrap_command(self, cmd, exec_command=False):
+        """
+        Prefix a shell command so it runs under this node's limits.
+
+        Args:
+            cmd: Shell command string
+            exec_command: Replace the shell with the command, so terminating the
+                Popen object terminates the command itself
+        """
+        if self.backend == "none":
+            return cmd
+
+        prelude = []
+        if self.backend == "cgroup":
+            prelude.append(f"echo $$ > {shlex.quote(os.path.join(self.cgroup_dir, 'cgroup.procs'))}")
+        else:
+            if self.limits.get("memory_bytes"):
+                # RLIMIT_DATA covers heap and private mappings without counting
+                # the address space reserved by CUDA/torch like RLIMIT_AS would
+                kilobytes = _clamp_to_hard_limit(self.limits["memory_bytes"], "RLIMIT_DATA", 1024)
+                prelude.append(f"ulimit -S -d {kilobytes}")
+            if self.limits.get("pids"):
+                pids = _clamp_to_hard_limit(self.limits["pids"], "RLIMIT_NPROC")
+                prelude.append(f"ulimit -S {NPROC_ULIMIT_FLAG} {pids}")
+        if self.limits.get("cpu_seconds"):
+            # A soft limit delivers SIGXCPU, which tells a CPU cap apart from other kills
+            seconds = _clamp_to_hard_limit(self.limits["cpu_seconds"], "RLIMIT_CPU")
+            prelude.append(f"ulimit -S -t {seconds}")
+
+        if not prelude:
+            return cmd
+        # A limit that cannot be applied must not keep the command from running
+        guarded = [
+            f"{{ {step}; }} 2>/dev/null || echo {shlex.quote(f'resource_governor: could not apply `{step}`, running without it')} >&2"
+            for step in prelude
+        ]
+        return f"{'; '.join(guarded)}; {'exec ' if exec_command else ''}{cmd}"
+
+    @contextlib.contextmanager
+    def measure(self):
+        """
+        Attribute the usage of children reaped inside the block to the node.
+
+        Wrap the call that waits for a governed command (communicate(), wait(),
+        poll()). Only the rlimit backend needs it; RUSAGE_CHILDREN grows when a
+        child is reaped, so anything reaped outside these blocks (e.g. uv sync
+        in STEP 1) is not counted.
+        """
+        if self.backend != "rlimit":
+            yield
+            return
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            yield
+        finally:
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            self._rusage["cpu_seconds"] += (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+            self._rusage["io_read_bytes"] += (after.ru_inblock - before.ru_inblock) * 512
+            self._rusage["io_write_bytes"] += (after.ru_oublock - before.ru_oublock) * 512
+            # ru_maxrss is the largest child ever reaped, so it is only attributable
+            # to this command if it grew; kilobytes on Linux, bytes on macOS
+            if after.ru_maxrss > before.ru_maxrss:
+                scale = 1 if sys.platform == "darwin" else 1024
+                self._rusage["peak_memory_bytes"] = max(self._rusage["peak_memory_bytes"] or 0, after.ru_maxrss * scale)
+
+    def note_exit(self, returncode, output=""):
+        """
+        Check whether a finished command was stopped by a limit.
+
+        Args:
+            returncode: The command's return code (negative for signals)
+            output: The command's captured stderr/stdout, if any
+        """
+        if self.limit_exceeded or not returncode:
+            return self.limit_exceeded
+        # Popen reports signals as negative codes, a shell as 128 + signal
+        signum = -returncode if returncode < 0 else returncode - 128
+        if signum in RLIMIT_SIGNALS:
+            self.limit_exceeded = RLIMIT_SIGNALS[signum]
+        elif self.backend == "rlimit":
+            for pattern, limit in LIMIT_PATTERNS:
+                if pattern.search(output or ""):
+                    self.limit_exceeded = limit
+                    break
+        return self.limit_exceeded
+
+    def usage(self):
+        """
+        Report resources used by the node's processes so far.
+
+        Returns:
+            dict: backend, peak_memory_bytes, cpu_seconds, io_read_bytes,
+                io_write_bytes and limit_exceeded (None, "memory", "pids", "cpu" or "disk")
+        """
+        usage = {
+            "backend": self.backend,
+            "limits": self.limits,
+            "peak_memory_bytes": None,
+            "cpu_seconds": None,
+            "io_read_bytes": None,
+            "io_write_bytes": None,
+            "limit_exceeded": self.limit_exceeded
+        }
+
+        if self.backend == "cgroup":
+            try:
+                with open(os.path.join(self.cgroup_dir, "memory.peak"), "r") as f:
+                    usage["peak_memory_bytes"] = int(f.read().strip())
+            except (OSError, ValueError):
+                pass
+            cpu_stat = _read_keyed(os.path.join(self.cgroup_dir, "cpu.stat"))
+            if "usage_usec" in cpu_stat:
+                usage["cpu_seconds"] = cpu_stat["usage_usec"] / 1e6
+            read_bytes = write_bytes = 0
+            try:
+                with open(os.path.join(self.cgroup_dir, "io.stat"), "r") as f:
+                    for line in f:
+                        fields = dict(item.split("=", 1) for item in line.split()[1:] if "=" in item)
+                        read_bytes += int(fields.get("rbytes", 0))
+                        write_bytes += int(fields.get("wbytes", 0))
+                usage["io_read_bytes"], usage["io_write_bytes"] = read_bytes, write_bytes
+            except (OSError, ValueError):
+                pass
+            if not usage["limit_exceeded"]:
+                if _read_keyed(os.path.join(self.cgroup_dir, "memory.events")).get("oom_kill"):
+                    usage["limit_exceeded"] = "memory"
+                elif _read_keyed(os.path.join(self.cgroup_dir, "pids.events")).get("max"):
+                    usage["limit_exceeded"] = "pids"
+
+        elif self.backend == "rlimit":
+            usage.update(self._rusage)
+
+        self.limit_exceeded = usage["limit_exceeded"]
+        return usage
+
+    def close(self):
+        """Kill anything left in the node's cgroup and remove it."""
+        if not self.cgroup_dir:
+            return
+        kill_file = os.path.join(self.cgroup_dir, "cgroup.kill")
+        try:
+            if os.path.exists(kill_file):
+                _write(kill_file, "1")
+            for _ in range(50):
+                with open(os.path.join(self.cgroup_dir, "cgroup.procs"), "r") as f:
+                    if not f.read().strip():
+                        break
+                time.sleep(0.1)
+            os.rmdir(self.cgroup_dir)
+        except OSError:
+            pass
+        self.cgroup_dir = None
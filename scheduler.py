@@ -0,0 +1,113 @@
+"""
+Similarity-aware ordering of the nodes in a run.
+
+Nodes that pull in the same stack (e.g. insightface/onnxruntime for InstantID,
+PuLID and face analysis, or the video wrapper group) are ordered back to back,
+so consecutive nodes differ in as few packages as possible. A node's resolved
+requirements are the package pins its install added or changed, taken from
+the footprints of earlier results files. Similarity is the Jaccard distance
+between those sets, and the order is built greedily by always running the
+nearest remaining node next. Nodes without history keep list order at the end.
+
+The install counts in schedule_report() are hypothetical: main.py restores a
+pristine venv for every cell, so no order changes how many packages a run
+installs. They show what the order would save if venvs were reused
+incrementally from one node to the next.
+"""
+import glob
+import json
+import os
+
+from footprint import normalize_name
+
+RESULTS_PATTERN = "comfyui_test_results_*.json"
+
+
+def resolved_requirements(footprint):
+    """Return the package pins a node's install added or changed, as a set of 'name==version'."""
+    pins = {f"{normalize_name(name)}=={version}" for name, version in footprint["added"].items()}
+    for kind in ("upgraded", "downgraded", "changed"):
+        pins |= {f"{normalize_name(name)}=={versions[1]}" for name, versions in footprint[kind].items()}
+    return pins
+
+
+def load_requirement_history(work_dir, max_files=10):
+    """
+    Collect each node's resolved requirements from the newest results files.
+
+    Returns:
+        dict: {node id: set of pins}, from the newest result that has a footprint
+    """
+    paths = sorted(glob.glob(os.path.join(work_dir, RESULTS_PATTERN)), reverse=True)[:max_files]
+    requirements = {}
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for result_data in results:
+            footprint = result_data.get("footprint")
+            if footprint and result_data["node_name"] not in requirements:
+                requirements[result_data["node_name"]] = resolved_requirements(footprint)
+    return requirements
+
+
+def jaccard_distance(a, b):
+    """1 - |a & b| / |a | b|; two empty sets are identical."""
+    union = a | b
+    return 1 - len(a & b) / len(union) if union else 0.0
+
+
+def order_by_similarity(node_ids, requirements):
+    """
+    Order nodes so each is followed by the most similar remaining one.
+
+    Args:
+        node_ids: Nodes in list order
+        requirements: {node id: set of pins} from load_requirement_history()
+
+    Returns:
+        list: Node ids, nodes without history last in list order
+    """
+    known = [node_id for node_id in node_ids if node_id in requirements]
+    unknown = [node_id for node_id in node_ids if node_id not in requirements]
+    if not known:
+        return list(node_ids)
+
+    order = [known.pop(0)]
+    while known:
+        current = requirements[order[-1]]
+        # min() keeps the first of equally close nodes, so ties follow list order
+        nearest = min(known, key=lambda node_id: jaccard_distance(current, requirements[node_id]))
+        known.remove(nearest)
+        order.append(nearest)
+    return order + unknown
+
+
+def count_installs(order, requirements):
+    """Count package installs if each node's venv were reused incrementally from the previous node's."""
+    installs = 0
+    previous = set()
+    for node_id in order:
+        current = requirements.get(node_id, set())
+        installs += len(current - previous)
+        previous = current
+    return installs
+
+
+def schedule_report(list_order, order, requirements):
+    """
+    Compare an order with list order, assuming incremental venv reuse (see the module docstring).
+
+    Returns:
+        dict: list_order_installs, scheduled_installs, installs_saved and nodes_without_history
+    """
+    list_installs = count_installs(list_order, requirements)
+    scheduled_installs = count_installs(order, requirements)
+    return {
+        "list_order_installs": list_installs,
+        "scheduled_installs": scheduled_installs,
+        "installs_saved": list_installs - scheduled_installs,
+        "nodes_without_history": [node_id for node_id in list_order if node_id not in requirements]
+    }
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Executable smoke workflows for custom nodes.
+
+A node showing up in /object_info only means its module imported. This module
+builds the smallest possible /prompt workflow for each node class whose inputs
+can be filled from primitives (INT, FLOAT, STRING, BOOLEAN and non-empty
+enums), submits it to a running ComfyUI server and records pass/fail plus the
+execution latency, so results files double as a per-node performance baseline.
+
+Only an execution_error is a crash of the node: an exception raised while
+the node's own code under custom_nodes/ is running. A prompt rejected at
+validation (the auto-filled defaults are not always valid), one that does not
+finish in time, or one that fails for lack of a real file, network service or
+credentials ("input_error") is recorded, but says nothing certain about the
+node. A timed out prompt is interrupted and the queue cleared, since ComfyUI
+runs one prompt at a time and everything after it would queue behind it.
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import uuid
+
+import requests
+
+from matrix import result_key
+
+PRIMITIVE_TYPES = ("INT", "FLOAT", "STRING", "BOOLEAN")
+
+# Sinks are only borrowed from ComfyUI itself so a smoke test never depends on
+# another custom node being installed.
+CORE_MODULE_PREFIXES = ("nodes", "comfy_extras.", "comfy_api_nodes.")
+
+# Exceptions a node raises when the generated inputs point at files, services
+# or accounts that do not exist on the test machine
+ENVIRONMENT_EXCEPTIONS = (
+    "OSError", "FileNotFoundError", "IsADirectoryError", "NotADirectoryError", "PermissionError",
+    "ConnectionError", "ConnectionRefusedError", "ConnectTimeout", "ReadTimeout", "Timeout", "TimeoutError",
+    "HTTPError", "URLError", "SSLError", "ProxyError", "HfHubHTTPError", "LocalEntryNotFoundError",
+    "RepositoryNotFoundError", "GatedRepoError", "EntryNotFoundError", "AuthenticationError", "OutOfMemoryError"
+)
+
+TRACEBACK_FILE_PATTERN = re.compile(r'File "([^"]+)"')
+
+
+def build_primitive_value(spec):
+    """
+    Build a value for a single input spec from /object_info.
+
+    Args:
+        spec: Input spec, e.g. ["INT", {"default": 0, "min": 0}] or [["a", "b"], {}]
+
+    Returns:
+        tuple: (bool, value) - (is_buildable, value)
+    """
+    input_type = spec[0]
+    options = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+
+    # Enums are either a plain list or the newer ["COMBO", {"options": [...]}] form
+    if input_type == "COMBO":
+        input_type = options.get("options", [])
+    if isinstance(input_type, list):
+        if not input_type:
+            # Empty enums are model/file pickers with nothing on disk
+            return False, None
+        default = options.get("default")
+        return True, default if default in input_type else input_type[0]
+
+    if input_type not in PRIMITIVE_TYPES:
+        return False, None
+
+    if "default" in options:
+        value = options["default"]
+    elif input_type == "INT":
+        value = 0
+    elif input_type == "FLOAT":
+        value = 0.0
+    elif input_type == "STRING":
+        value = ""
+    else:
+        value = False
+
+    if input_type in ("INT", "FLOAT"):
+        if options.get("min") is not None:
+            value = max(value, options["min"])
+        if options.get("max") is not None:
+            value = min(value, options["max"])
+    return True, value
+
+
+def build_primitive_inputs(node_def, skip=()):
+    """
+    Build all required inputs of a node class from primitives.
+
+    Args:
+        node_def: The node class definition from /object_info
+        skip: Input names that are provided some other way (e.g. by a link)
+
+    Returns:
+        dict or None: Input values, or None if any required input is not a primitive
+    """
+    inputs = {}
+    for input_name, spec in node_def.get("input", {}).get("required", {}).items():
+        if input_name in skip:
+            continue
+        buildable, value = build_primitive_value(spec)
+        if not buildable:
+            return None
+        inputs[input_name] = value
+    return inputs
+
+
+def find_output_sink(output_type, object_info):
+    """
+    Find a core output node that can consume a single output of the given type.
+    Preview nodes are preferred since they only write to ComfyUI's temp folder.
+    Primitive outputs only go into wildcard ("*") inputs, never into widgets.
+
+    Returns:
+        tuple: (class_name, link_input_name, inputs) or None
+    """
+    accepted_types = ("*",) if output_type in PRIMITIVE_TYPES else (output_type, "*")
+    candidates = sorted(object_info.items(), key=lambda item: not item[0].startswith("Preview"))
+    for class_name, node_def in candidates:
+        if not node_def.get("output_node"):
+            continue
+        if not node_def.get("python_module", "").startswith(CORE_MODULE_PREFIXES):
+            continue
+
+        required = node_def.get("input", {}).get("required", {})
+        link_inputs = [
+            name for name, spec in required.items()
+            if spec[0] in accepted_types
+        ]
+        if len(link_inputs) != 1:
+            continue
+        inputs = build_primitive_inputs(node_def, skip=link_inputs)
+        if inputs is not None:
+            return class_name, link_inputs[0], inputs
+    return None
+
+
+def build_smoke_workflow(class_name, object_info):
+    """
+    Build a minimal /prompt workflow that executes the given node class.
+
+    Output nodes are submitted on their own. Other nodes are wired into a core
+    output node (e.g. PreviewImage) so ComfyUI has something to execute.
+
+    Returns:
+        tuple: (dict or None, str) - (prompt, reason it could not be built)
+    """
+    node_def = object_info[class_name]
+    inputs = build_primitive_inputs(node_def)
+    if inputs is None:
+        return None, "Required inputs cannot be built from primitives"
+
+    prompt = {"1": {"class_type": class_name, "inputs": inputs}}
+    if node_def.get("output_node"):
+        return prompt, ""
+
+    for output_index, output_type in enumerate(node_def.get("output", [])):
+        sink = find_output_sink(output_type, object_info)
+        if sink:
+            sink_class, link_input, sink_inputs = sink
+            sink_inputs[link_input] = ["1", output_index]
+            prompt["2"] = {"class_type": sink_class, "inputs": sink_inputs}
+            return prompt, ""
+
+    return None, "No core output node accepts any of its outputs"
+
+
+def _execution_latency(status):
+    """Prefer the server-side execution timestamps, when ComfyUI reports them."""
+    timestamps = {}
+    for event, data in status.get("messages", []):
+        if isinstance(data, dict) and "timestamp" in data:
+            timestamps[event] = data["timestamp"]
+    end = timestamps.get("execution_success", timestamps.get("execution_error"))
+    if "execution_start" in timestamps and end is not None:
+        return (end - timestamps["execution_start"]) / 1000.0
+    return None
+
+
+def classify_execution_error(data, class_name):
+    """
+    Tell a crash in the node's own code from a failure caused by the generated inputs.
+
+    Args:
+        data (dict): The execution_error message reported by ComfyUI
+        class_name (str): The node class under test
+
+    Returns:
+        str: "execution_error" if the tested node's code raised an exception that is
+            not about missing files, services or credentials, otherwise "input_error"
+    """
+    if data.get("node_type") != class_name:
+        return "input_error"
+    if data.get("exception_type", "").rsplit(".", 1)[-1] in ENVIRONMENT_EXCEPTIONS:
+        return "input_error"
+    frames = TRACEBACK_FILE_PATTERN.findall("".join(data.get("traceback") or []))
+    if not any("custom_nodes" in frame.replace("\\", "/").split("/") for frame in frames):
+        return "input_error"
+    return "execution_error"
+
+
+def cancel_prompt(base_url, prompt_id):
+    """Drop a prompt from the queue, interrupt whatever is executing and clear the queue."""
+    for path, payload in (("queue", {"delete": [prompt_id]}), ("interrupt", None), ("queue", {"clear": True})):
+        try:
+            requests.post(f"{base_url}/{path}", json=payload, timeout=5)
+        except requests.exceptions.RequestException:
+            pass
+
+
+def run_smoke_workflow(base_url, prompt, timeout=60):
+    """
+    Submit a workflow to /prompt and wait for it to finish.
+
+    Returns:
+        dict: {"success", "failure", "latency_seconds", "error_message"} - failure is None,
+            "rejected", "execution_error", "input_error", "timeout" or "request_error"
+    """
+    result = {"success": False, "failure": None, "latency_seconds": None, "error_message": None}
+    start_time = time.time()
+    try:
+        response = requests.post(
+            f"{base_url}/prompt",
+            json={"prompt": prompt, "client_id": uuid.uuid4().hex},
+            timeout=10
+        )
+        if response.status_code != 200:
+            result["failure"] = "rejected"
+            result["error_message"] = f"Prompt rejected with status code {response.status_code}: {response.text}"
+            return result
+        prompt_id = response.json()["prompt_id"]
+
+        while time.time() - start_time < timeout:
+            history = requests.get(f"{base_url}/history/{prompt_id}", timeout=5).json()
+            status = history.get(prompt_id, {}).get("status")
+            if status and status.get("status_str"):
+                latency = _execution_latency(status)
+                result["latency_seconds"] = latency if latency is not None else time.time() - start_time
+                if status["status_str"] == "success":
+                    result["success"] = True
+                else:
+                    errors = [data for event, data in status.get("messages", []) if event == "execution_error"]
+                    result["failure"] = "input_error"
+                    if any(classify_execution_error(data, prompt["1"]["class_type"]) == "execution_error" for data in errors):
+                        result["failure"] = "execution_error"
+                    result["error_message"] = "\n".join(
+                        f"{data.get('exception_type', 'Exception')}: {data.get('exception_message', '')}" for data in errors
+                    ) or f"Execution status: {status['status_str']}"
+                return result
+            time.sleep(0.1)
+
+        cancel_prompt(base_url, prompt_id)
+        result["failure"] = "timeout"
+        result["error_message"] = f"Workflow did not finish within {timeout} seconds"
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        result["failure"] = "request_error"
+        result["error_message"] = str(e)
+    return result
+
+
+def run_smoke_tests(base_url, class_names, object_info, timeout=60):
+    """
+    Run a smoke workflow for each node class.
+
+    After a timeout the remaining classes are skipped: interrupting does not
+    stop everything (e.g. a model download at load time), and each of them
+    could hang just as long.
+
+    Returns:
+        dict: Per class result; classes that cannot be built are marked as skipped
+    """
+    results = {}
+    timed_out = None
+    for class_name in class_names:
+        if timed_out:
+            results[class_name] = {"skipped": True, "reason": f"Not run after {timed_out} timed out"}
+            continue
+        prompt, reason = build_smoke_workflow(class_name, object_info)
+        if prompt is None:
+            results[class_name] = {"skipped": True, "reason": reason}
+            continue
+        results[class_name] = {"skipped": False, **run_smoke_workflow(base_url, prompt, timeout)}
+        if results[class_name]["failure"] == "timeout":
+            timed_out = class_name
+    return results
+
+
+def compare_smoke_latencies(baseline_results, results, threshold=1.5, min_delta=0.5):
+    """
+    Find node classes whose smoke latency regressed against a baseline results file.
+
+    A class regresses when it got both `threshold` times slower and at least
+    `min_delta` seconds slower, so sub-second jitter is not reported. Classes
+    are compared per node version and torch extra.
+
+    Returns:
+        list: Regressions sorted by slowdown, largest first
+    """
+    def latencies(run):
+        by_class = {}
+        for result_data in run:
+            smoke = result_data.get("steps", {}).get("smoke_test", {})
+            for class_name, entry in smoke.get("node_classes", {}).items():
+                if entry.get("success") and entry.get("latency_seconds") is not None:
+                    _, version, extra = result_key(result_data)
+                    by_class[(version, extra, class_name)] = (result_data["node_name"], entry["latency_seconds"])
+        return by_class
+
+    baseline = latencies(baseline_results)
+    regressions = []
+    for key, (node_name, latency) in latencies(results).items():
+        if key not in baseline:
+            continue
+        old_latency = baseline[key][1]
+        if latency - old_latency >= min_delta and latency >= old_latency * threshold:
+            version, extra, class_name = key
+            regressions.append({
+                "node_name": node_name,
+                "version": version,
+                "extra": extra,
+                "node_class": class_name,
+                "baseline_seconds": old_latency,
+                "current_seconds": latency,
+                "slowdown": latency / old_latency if old_latency else float("inf")
+            })
+    return sorted(regressions, key=lambda r: r["slowdown"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare smoke test latencies between two test result files")
+    parser.add_argument("baseline", help="Results JSON file of the baseline run")
+    parser.add_argument("current", help="Results JSON file of the run to check")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Slowdown factor that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.5, help="Minimum slowdown in seconds that counts as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline_results = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        results = json.load(f)
+
+    regressions = compare_smoke_latencies(baseline_results, results, args.threshold, args.min_delta)
+    for r in regressions:
+        cell = f"@{r['version']}+{r['extra']}" if r["extra"] else ""
+        print(f"{r['node_name']}{cell} / {r['node_class']}: {r['baseline_seconds']:.3f}s -> {r['current_seconds']:.3f}s ({r['slowdown']:.1f}x)")
+    if not regressions:
+        print("No smoke test latency regressions found")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
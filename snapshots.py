@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Content-addressed snapshots of /object_info.
+
+Every node class definition is canonicalised (sorted keys, compact separators)
+and stored once under its SHA-256 hash. A run only writes a small manifest
+mapping node class names to hashes, so the store grows with actual interface
+changes instead of with the number of runs.
+
+A run tests several versions and torch extras of the same node, so main.py
+writes one manifest per cell; diffing two runs compares them cell by cell,
+and two cells of one run can be diffed to compare node versions. ComfyUI's own
+classes are the same in every cell, so they are recorded once per ComfyUI
+checkout in a core manifest, and a cell manifest only keeps the node's
+classes plus any core class whose definition differs from the core manifest
+(a node patching a core class).
+
+Layout:
+    <store>/objects/ab/cdef....json            canonical node class definitions
+    <store>/manifests/<run_id>/<cell>.json      {"run_id", "cell", "core", "created", "node_classes": {name: hash}}
+    <store>/manifests/<run_id>/core/<core>.json ComfyUI's classes, shared by the cells naming <core>
+    <store>/manifests/<run_id>.json             older runs, one manifest for the whole run
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+
+DEFAULT_STORE_DIR = os.path.abspath("./object_info_store")
+DEFAULT_CORE_ID = "comfyui"
+CORE_LABEL_PREFIX = "core/"
+
+
+def canonicalize_node(node_def):
+    """Serialize a node class definition so equal definitions give equal bytes."""
+    return json.dumps(node_def, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _object_path(store_dir, digest):
+    return os.path.join(store_dir, "objects", digest[:2], f"{digest[2:]}.json")
+
+
+def _manifest_path(store_dir, run_id, cell=None):
+    if cell is not None and cell.startswith(CORE_LABEL_PREFIX):
+        return os.path.join(store_dir, "manifests", run_id, "core", f"{cell[len(CORE_LABEL_PREFIX):]}.json")
+    if cell is not None:
+        return os.path.join(store_dir, "manifests", run_id, f"{cell}.json")
+    return os.path.join(store_dir, "manifests", f"{run_id}.json")
+
+
+def _is_core(node_def):
+    return not node_def.get("python_module", "").startswith("custom_nodes.")
+
+
+def put_node(node_def, store_dir=DEFAULT_STORE_DIR):
+    """
+    Store a node class definition unless an identical one is already stored.
+
+    Returns:
+        tuple: (str, bool) - (hash, was_written)
+    """
+    data = canonicalize_node(node_def)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(store_dir, digest)
+    if os.path.exists(path):
+        return digest, False
+    _write_atomic(path, data)
+    return digest, True
+
+
+def get_node(digest, store_dir=DEFAULT_STORE_DIR):
+    """Load a node class definition by hash."""
+    with open(_object_path(store_dir, digest), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest(run_id, store_dir=DEFAULT_STORE_DIR, cell=None):
+    """
+    Load a run or cell manifest.
+
+    Args:
+        run_id: A run id from list_runs(), or a path to a manifest file
+        cell: A cell id from list_cells(), or "core/<core>" for a core manifest
+    """
+    path = run_id if os.path.isfile(run_id) else _manifest_path(store_dir, run_id, cell)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_runs(store_dir=DEFAULT_STORE_DIR):
+    """Return all run ids in the store, oldest first."""
+    manifest_dir = os.path.join(store_dir, "manifests")
+    if not os.path.isdir(manifest_dir):
+        return []
+    return sorted({
+        name[:-len(".json")] if name.endswith(".json") else name
+        for name in os.listdir(manifest_dir)
+        if name.endswith(".json") or os.path.isdir(os.path.join(manifest_dir, name))
+    })
+
+
+def list_cells(run_id, store_dir=DEFAULT_STORE_DIR):
+    """Return the cell ids with their own manifest in a run."""
+    run_dir = os.path.join(store_dir, "manifests", run_id)
+    if not os.path.isdir(run_dir):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(run_dir) if name.endswith(".json"))
+
+
+def load_snapshot(spec, store_dir=DEFAULT_STORE_DIR):
+    """
+    Load the manifests a diff argument refers to.
+
+    Args:
+        spec: "<run_id>", "<run_id>/<cell>" or a path to a manifest file
+
+    Returns:
+        dict: {cell or None: manifest}; None stands for a whole-run manifest, and the
+            core manifests the cells refer to are included as "core/<core>"
+    """
+    if os.path.isfile(spec):
+        return {None: load_manifest(spec, store_dir)}
+    run_id, _, cell = spec.partition("/")
+    cells = [cell] if cell else list_cells(run_id, store_dir)
+    if not cells:
+        return {None: load_manifest(run_id, store_dir)}
+    snapshot = {cell: load_manifest(run_id, store_dir, cell) for cell in cells}
+    for core_id in {manifest["core"] for manifest in snapshot.values() if manifest.get("core")}:
+        snapshot[CORE_LABEL_PREFIX + core_id] = load_manifest(run_id, store_dir, CORE_LABEL_PREFIX + core_id)
+    return snapshot
+
+
+def _with_core(manifest, snapshot):
+    """Return a cell manifest with the classes of its core manifest added."""
+    core = snapshot.get(CORE_LABEL_PREFIX + manifest["core"]) if manifest.get("core") else None
+    if core is None:
+        return manifest
+    return {**manifest, "node_classes": {**core["node_classes"], **manifest["node_classes"]}}
+
+
+def pair_snapshots(old, new):
+    """
+    Pair up the manifests of two snapshots from load_snapshot().
+
+    Two single manifests are compared with each other, and a whole-run
+    manifest with every cell on the other side, each including its core
+    classes. Otherwise cells and core manifests are compared with the same
+    cell or core manifest of the other run.
+
+    Returns:
+        list: (label, old_manifest, new_manifest) tuples
+    """
+    def cells(snapshot):
+        return {cell: manifest for cell, manifest in snapshot.items() if not (cell or "").startswith(CORE_LABEL_PREFIX)}
+
+    old_cells, new_cells = cells(old), cells(new)
+    if len(old_cells) == 1 and len(new_cells) == 1:
+        (old_cell, old_manifest), (new_cell, new_manifest) = next(iter(old_cells.items())), next(iter(new_cells.items()))
+        label = new_cell if old_cell in (None, new_cell) else f"{old_cell} -> {new_cell}"
+        return [(label, _with_core(old_manifest, old), _with_core(new_manifest, new))]
+    if None in old:
+        return [(cell, old[None], _with_core(manifest, new)) for cell, manifest in new_cells.items()]
+    if None in new:
+        return [(cell, _with_core(manifest, old), new[None]) for cell, manifest in old_cells.items()]
+    return [(cell, old[cell], new[cell]) for cell in sorted(old.keys() & new.keys())]
+
+
+def snapshot_object_info(object_info, run_id, store_dir=DEFAULT_STORE_DIR, cell=None, core_id=DEFAULT_CORE_ID):
+    """
+    Record an /object_info response in the run's manifest.
+
+    With a cell, the response gets a manifest of its own, and ComfyUI's own
+    classes go to the run's core manifest for core_id, written by the first
+    cell of that ComfyUI checkout. Without a cell, repeated calls for the same
+    run are merged into one manifest.
+
+    Args:
+        core_id: Names the ComfyUI checkout the response came from; cells of one
+            run tested on different ComfyUI commits need different ids
+
+    Returns:
+        tuple: (dict, int) - (manifest, number_of_new_objects)
+    """
+    new_objects = 0
+    if cell is not None:
+        core_cell = CORE_LABEL_PREFIX + core_id
+        try:
+            core_classes = load_manifest(run_id, store_dir, core_cell)["node_classes"]
+        except FileNotFoundError:
+            core_classes = {}
+            for class_name, node_def in object_info.items():
+                if _is_core(node_def):
+                    digest, written = put_node(node_def, store_dir)
+                    core_classes[class_name] = digest
+                    new_objects += written
+            core_manifest = {
+                "run_id": run_id,
+                "created": datetime.datetime.utcnow().isoformat(),
+                "node_classes": core_classes
+            }
+            _write_atomic(
+                _manifest_path(store_dir, run_id, core_cell),
+                json.dumps(core_manifest, indent=1, sort_keys=True).encode("utf-8")
+            )
+        object_info = {
+            class_name: node_def for class_name, node_def in object_info.items()
+            if not _is_core(node_def)
+            or core_classes.get(class_name) != hashlib.sha256(canonicalize_node(node_def)).hexdigest()
+        }
+
+    manifest = None
+    if cell is None:
+        try:
+            manifest = load_manifest(run_id, store_dir)
+        except FileNotFoundError:
+            pass
+    if manifest is None:
+        manifest = {
+            "run_id": run_id,
+            "created": datetime.datetime.utcnow().isoformat(),
+            "node_classes": {}
+        }
+        if cell is not None:
+            manifest["cell"] = cell
+            manifest["core"] = core_id
+
+    for class_name, node_def in object_info.items():
+        digest, written = put_node(node_def, store_dir)
+        manifest["node_classes"][class_name] = digest
+        new_objects += written
+
+    _write_atomic(_manifest_path(store_dir, run_id, cell), json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+    return manifest, new_objects
+
+
+def _diff_inputs(old_def, new_def):
+    """Diff input fields of two node class definitions, keyed as '<section>.<name>'."""
+    def flatten(node_def):
+        fields = {}
+        for section, inputs in node_def.get("input", {}).items():
+            for name, spec in inputs.items():
+                fields[f"{section}.{name}"] = spec
+        return fields
+
+    old_fields, new_fields = flatten(old_def), flatten(new_def)
+    return {
+        "added": sorted(new_fields.keys() - old_fields.keys()),
+        "removed": sorted(old_fields.keys() - new_fields.keys()),
+        "changed": sorted(k for k in old_fields.keys() & new_fields.keys() if old_fields[k] != new_fields[k])
+    }
+
+
+def diff_manifests(old_manifest, new_manifest, store_dir=DEFAULT_STORE_DIR):
+    """
+    Compare two run manifests.
+
+    Only classes whose hashes differ are loaded from the store.
+
+    Returns:
+        dict: {"added": [...], "removed": [...], "changed": {class_name: {"inputs": ..., "fields": [...]}}}
+    """
+    old_classes, new_classes = old_manifest["node_classes"], new_manifest["node_classes"]
+    changed = {}
+    for class_name in sorted(old_classes.keys() & new_classes.keys()):
+        if old_classes[class_name] == new_classes[class_name]:
+            continue
+        old_def = get_node(old_classes[class_name], store_dir)
+        new_def = get_node(new_classes[class_name], store_dir)
+        changed[class_name] = {
+            "inputs": _diff_inputs(old_def, new_def),
+            "fields": sorted(
+                key for key in old_def.keys() | new_def.keys()
+                if key not in ("input", "input_order") and old_def.get(key) != new_def.get(key)
+            )
+        }
+
+    return {
+        "added": sorted(new_classes.keys() - old_classes.keys()),
+        "removed": sorted(old_classes.keys() - new_classes.keys()),
+        "changed": changed
+    }
+
+
+def format_diff(diff):
+    """Render a manifest diff as human readable lines."""
+    lines = [f"+ {name}" for name in diff["added"]]
+    lines += [f"- {name}" for name in diff["removed"]]
+    for class_name, change in diff["changed"].items():
+        lines.append(f"~ {class_name}")
+        for kind, marker in (("added", "+"), ("removed", "-"), ("changed", "~")):
+            lines += [f"    {marker} input {field}" for field in change["inputs"][kind]]
+        lines += [f"    ~ {field}" for field in change["fields"]]
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect object_info snapshots recorded by main.py")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="Snapshot store directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List recorded runs and their cells")
+    diff_parser = subparsers.add_parser("diff", help="Diff two runs (defaults to the two most recent)")
+    diff_parser.add_argument("old_run", nargs="?", help="Run id, run_id/cell or manifest path")
+    diff_parser.add_argument("new_run", nargs="?", help="Run id, run_id/cell or manifest path")
+    diff_parser.add_argument("--json", action="store_true", help="Print the diff as JSON")
+    args = parser.parse_args()
+
+    runs = list_runs(args.store)
+    if args.command == "list":
+        for run_id in runs:
+            print(run_id)
+            for cell in list_cells(run_id, args.store):
+                print(f"  {run_id}/{cell}")
+        return 0
+
+    old_run, new_run = args.old_run, args.new_run
+    if old_run is None or new_run is None:
+        if len(runs) < 2:
+            print("Need at least two recorded runs to diff", file=sys.stderr)
+            return 1
+        old_run, new_run = runs[-2], runs[-1]
+
+    pairs = pair_snapshots(load_snapshot(old_run, args.store), load_snapshot(new_run, args.store))
+    diffs = {label: diff_manifests(old_manifest, new_manifest, args.store) for label, old_manifest, new_manifest in pairs}
+    if args.json:
+        print(json.dumps(diffs if len(diffs) != 1 else next(iter(diffs.values())), indent=2))
+        return 0
+    for label, diff in diffs.items():
+        lines = format_diff(diff)
+        if len(diffs) > 1:
+            if not lines:
+                continue
+            print(f"== {label}")
+        print("\n".join(lines) if lines else "No node class changes")
+    if len(diffs) > 1 and not any(format_diff(diff) for diff in diffs.values()):
+        print("No node class changes")
+    if not diffs:
+        print("No cells in common", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
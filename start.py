@@ -4,6 +4,14 @@ import sys
 import subprocess
 import platform
 import argparse
+import concurrent.futures
+import hashlib
+import json
+import shutil
+import time
+
+COMFYUI_REPO = "https://github.com/comfyanonymous/ComfyUI"
+MANAGER_REPO = "https://github.com/ltdrdata/ComfyUI-Manager"
 
 # ANSI color codes for terminal output
 class Colors:
@@ -63,65 +71,203 @@ def run_command(cmd, cwd=None, shell=True):
 
 def is_git_installed():
     """Check if git is installed"""
-    success, _, _ = run_command("git --version", shell=True)
-    return success
+    return shutil.which("git") is not None
 
 def is_uv_installed():
     """Check if uv is installed"""
-    success, _, _ = run_command("uv --version", shell=True)
-    return success
+    return shutil.which("uv") is not None
+
+def get_python_path(comfy_dir):
+    """Return the venv Python executable path for the platform"""
+    if platform.system() == "Windows":
+        return os.path.join(comfy_dir, ".venv", "Scripts", "python.exe")
+    return os.path.join(comfy_dir, ".venv", "bin", "python")
 
-def clone_repository(repo_url, target_dir, branch=None):
-    """Clone a git repository"""
+def read_git_head(repo_dir):
+    """
+    Read the checked out branch and commit straight from .git, without running git.
+
+    Returns:
+        tuple: (branch or None, commit or None)
+    """
+    git_dir = os.path.join(repo_dir, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+    if not head.startswith("ref: "):
+        return None, head
+
+    ref = head[len("ref: "):]
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else None
+    try:
+        with open(os.path.join(git_dir, ref), "r") as f:
+            return branch, f.read().strip()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return branch, parts[0]
+    except OSError:
+        pass
+    return branch, None
+
+def hash_file(path):
+    """Return the sha256 of a file, or None if it does not exist"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def clone_repository(repo_url, target_dir, branch=None, reference_dir=None, shallow=True):
+    """
+    Clone a git repository.
+
+    Clones are shallow and blob-less by default. If reference_dir contains a
+    mirror named after the repository (e.g. ComfyUI.git), its objects are reused.
+    """
     if os.path.exists(target_dir):
-        print_warning(f"Directory {target_dir} already exists. Skipping clone.")
-        if branch:
-            # Try to checkout the branch
-            success, _, _ = run_command(f"git checkout {branch}", cwd=target_dir)
-            if success:
-                print_success(f"Checked out branch {branch}")
-            else:
-                print_error(f"Failed to checkout branch {branch}")
-        return True
-    
-    cmd = f"git clone {repo_url} {target_dir}"
-    success, _, _ = run_command(cmd)
-    
-    if not success:
-        return False
-    
-    if branch:
+        current_branch, _ = read_git_head(target_dir)
+        if not branch or current_branch == branch:
+            print_warning(f"Directory {target_dir} already exists. Skipping clone.")
+            return True
+        # Shallow clones only know their own branch, so fetch the requested one first
         success, _, _ = run_command(f"git checkout {branch}", cwd=target_dir)
         if not success:
+            success, _, _ = run_command(f"git fetch --depth 1 origin {branch}", cwd=target_dir)
+            if success:
+                success, _, _ = run_command(f"git checkout -B {branch} FETCH_HEAD", cwd=target_dir)
+        if success:
+            print_success(f"Checked out branch {branch}")
+        else:
             print_error(f"Failed to checkout branch {branch}")
-            return False
+        return success
     
+    cmd = "git clone"
+    if shallow:
+        cmd += " --depth 1 --filter=blob:none --single-branch"
+    if branch:
+        cmd += f" --branch {branch}"
+    if reference_dir:
+        mirror = os.path.join(reference_dir, repo_url.rstrip("/").split("/")[-1] + ".git")
+        cmd += f" --reference-if-able {mirror}"
+    cmd += f" {repo_url} {target_dir}"
+    success, _, _ = run_command(cmd)
+    return success
+
+def clone_repositories(comfy_dir, branch, reference_dir=None, shallow=True):
+    """
+    Clone ComfyUI and ComfyUI-Manager concurrently.
+
+    Manager lives inside the ComfyUI checkout, so on a fresh setup it is cloned
+    into a staging directory next to it and moved in once both clones finished.
+
+    Returns:
+        bool: True if both repositories are in place
+    """
+    manager_dir = os.path.join(comfy_dir, "custom_nodes", "ComfyUI-Manager")
+    manager_target = manager_dir if os.path.exists(comfy_dir) else f"{comfy_dir}.ComfyUI-Manager.tmp"
+    if manager_target != manager_dir and os.path.exists(manager_target):
+        shutil.rmtree(manager_target)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        comfy_future = executor.submit(
+            clone_repository, COMFYUI_REPO, comfy_dir, branch, reference_dir, shallow
+        )
+        manager_future = executor.submit(
+            clone_repository, MANAGER_REPO, manager_target, None, reference_dir, shallow
+        )
+        comfy_ok, manager_ok = comfy_future.result(), manager_future.result()
+
+    if not comfy_ok:
+        print_error("Failed to clone ComfyUI repository")
+        return False
+    if not manager_ok:
+        print_error("Failed to clone ComfyUI-Manager repository")
+        return False
+    if manager_target != manager_dir:
+        os.makedirs(os.path.dirname(manager_dir), exist_ok=True)
+        shutil.move(manager_target, manager_dir)
     return True
 
+def load_setup_manifest(path):
+    """Load the fingerprints of previously completed setup stages"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_setup_manifest(path, manifest):
+    """Persist the fingerprints of completed setup stages"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def run_stage(name, fingerprint_fn, action, manifest, timings, force=False):
+    """
+    Run a setup stage unless its fingerprint matches the last successful run.
+
+    Args:
+        name: Stage name, used as the manifest key
+        fingerprint_fn: Callable returning a JSON-serializable dict that describes the stage's current state,
+            or None if that state is not what the stage should produce
+        action: Callable returning True on success
+        manifest: Setup manifest dict, updated in place on success
+        timings: List of (name, status, seconds) tuples, appended to
+        force: Run the stage even if the fingerprint matches
+
+    Returns:
+        bool: True if the stage succeeded or was skipped
+    """
+    start_time = time.time()
+    fingerprint = fingerprint_fn()
+    if not force and fingerprint is not None and manifest.get(name) == fingerprint:
+        print_success(f"{name}: up to date, skipping")
+        timings.append((name, "skipped", time.time() - start_time))
+        return True
+
+    success = action()
+    timings.append((name, "done" if success else "failed", time.time() - start_time))
+    # Fingerprint the state the stage left behind, so the next run can skip it
+    fingerprint = fingerprint_fn() if success else None
+    if fingerprint is not None:
+        manifest[name] = fingerprint
+    else:
+        manifest.pop(name, None)
+    return success
+
+def print_timings(timings):
+    """Print how long each setup stage took"""
+    print_colored("Stage timings:", Colors.CYAN)
+    for name, status, seconds in timings:
+        print(f"  {name:<12} {status:<8} {seconds:8.2f}s")
+    print(f"  {'total':<12} {'':<8} {sum(t[2] for t in timings):8.2f}s")
+
 def setup_venv(comfy_dir):
     """Set up the virtual environment"""
     success, _, _ = run_command("uv venv", cwd=comfy_dir)
     if not success:
         return False
     
-    # Determine the Python executable path based on the platform
-    if platform.system() == "Windows":
-        python_path = os.path.join(comfy_dir, ".venv", "Scripts", "python.exe")
-    else:
-        python_path = os.path.join(comfy_dir, ".venv", "bin", "python")
-    
     # Ensure pip is installed in the venv
-    success, _, _ = run_command(f"{python_path} -m ensurepip --upgrade", cwd=comfy_dir)
+    success, _, _ = run_command(f"{get_python_path(comfy_dir)} -m ensurepip --upgrade", cwd=comfy_dir)
     return success
 
-def install_dependencies(comfy_dir):
-    """Install dependencies using uv sync"""
+def default_torch_extra():
+    """Return the torch extra to sync for the platform"""
     if platform.system() == "Darwin":  # macOS
-        cmd = "uv sync --extra cpu"
-    else:  # Windows or Linux
-        cmd = "uv sync --extra cu126"
-    
-    success, stdout, stderr = run_command(cmd, cwd=comfy_dir)
+        return "cpu"
+    return "cu126"  # Windows or Linux
+
+def install_dependencies(comfy_dir, extra):
+    """Install dependencies using uv sync, precompiling site-packages in parallel"""
+    success, stdout, stderr = run_command(f"uv sync --compile-bytecode --extra {extra}", cwd=comfy_dir)
     if success:
         print_success("Dependencies installed successfully")
     else:
@@ -129,10 +275,51 @@ def install_dependencies(comfy_dir):
     
     return success
 
+def precompile_comfyui(comfy_dir):
+    """Compile ComfyUI's own sources to bytecode using all cores"""
+    # The venv is compiled by uv sync and custom nodes by main.py after each install;
+    # data folders are skipped so compileall does not walk them
+    skip = {".venv", ".git", "custom_nodes", "models", "input", "output", "temp", "user"}
+    targets = " ".join(f'"{name}"' for name in sorted(os.listdir(comfy_dir)) if name not in skip)
+    success, _, stderr = run_command(f'"{get_python_path(comfy_dir)}" -m compileall -q -j 0 {targets}', cwd=comfy_dir)
+    if not success:
+        print_error(f"Failed to precompile ComfyUI sources: {stderr}")
+    return success
+
+def venv_fingerprint(comfy_dir):
+    """
+    Describe the venv by what it was built from, not by the venv instance:
+    main.py deletes and relinks .venv for every node, which must not make
+    the next setup rebuild it.
+
+    Returns:
+        dict or None: The interpreter the venv uses, or None if it has no python
+    """
+    if not os.path.exists(get_python_path(comfy_dir)):
+        return None
+    config = {}
+    try:
+        with open(os.path.join(comfy_dir, ".venv", "pyvenv.cfg"), "r") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep:
+                    config[key.strip()] = value.strip()
+    except OSError:
+        return None
+    return {
+        "python_version": config.get("version_info") or config.get("version"),
+        "implementation": config.get("implementation")
+    }
+
 def main():
     parser = argparse.ArgumentParser(description="Set up ComfyUI for testing custom nodes")
     parser.add_argument("--comfy-dir", default="./ComfyUI", help="Directory where ComfyUI will be cloned")
     parser.add_argument("--branch", default="rh-uvtest", help="Branch to checkout for ComfyUI")
+    parser.add_argument("--extra", default=default_torch_extra(), help="Torch extra to pass to uv sync (e.g. cpu, cu126)")
+    parser.add_argument("--reference-dir", help="Directory with bare mirrors (ComfyUI.git, ComfyUI-Manager.git) to reuse objects from")
+    parser.add_argument("--full-clone", action="store_true", help="Clone full history instead of shallow, blob-less clones")
+    parser.add_argument("--cache-dir", default="./.ci_cache", help="Directory for the setup manifest")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if it is up to date")
     parser.add_argument("--skip-clone", action="store_true", help="Skip cloning repositories")
     parser.add_argument("--skip-venv", action="store_true", help="Skip creating virtual environment")
     parser.add_argument("--skip-deps", action="store_true", help="Skip installing dependencies")
@@ -141,6 +328,9 @@ def main():
     
     # Convert to absolute path
     comfy_dir = os.path.abspath(args.comfy_dir)
+    manager_dir = os.path.join(comfy_dir, "custom_nodes", "ComfyUI-Manager")
+    reference_dir = os.path.abspath(args.reference_dir) if args.reference_dir else None
+    manifest_path = os.path.join(os.path.abspath(args.cache_dir), "setup_manifest.json")
     
     print_colored("ComfyUI Custom Node Testing Setup", Colors.HEADER + Colors.BOLD)
     print_colored("=" * 50, Colors.HEADER)
@@ -162,52 +352,76 @@ def main():
         return 1
     else:
         print_success("uv installed successfully")
-    
-    # Step 1: Clone ComfyUI repository
-    if not args.skip_clone:
-        print_step(1, "Cloning ComfyUI repository")
-        if not clone_repository("https://github.com/comfyanonymous/ComfyUI", comfy_dir, args.branch):
-            print_error("Failed to clone ComfyUI repository")
-            return 1
-        print_success("ComfyUI repository cloned successfully")
-    
-    # Step 2: Clone ComfyUI-Manager repository
-    if not args.skip_clone:
-        print_step(2, "Cloning ComfyUI-Manager repository")
-        manager_dir = os.path.join(comfy_dir, "custom_nodes", "ComfyUI-Manager")
-        # Create custom_nodes directory if it doesn't exist
-        os.makedirs(os.path.dirname(manager_dir), exist_ok=True)
-        if not clone_repository("https://github.com/ltdrdata/ComfyUI-Manager", manager_dir):
-            print_error("Failed to clone ComfyUI-Manager repository")
-            return 1
-        print_success("ComfyUI-Manager repository cloned successfully")
-    
-    # Step 3: Create virtual environment
-    if not args.skip_venv:
-        print_step(3, "Creating virtual environment")
-        if not setup_venv(comfy_dir):
-            print_error("Failed to create virtual environment")
-            return 1
-        print_success("Virtual environment created successfully")
-    
-    # Step 4: Install dependencies
-    if not args.skip_deps:
-        print_step(4, "Installing dependencies")
-        if not install_dependencies(comfy_dir):
-            print_error("Failed to install dependencies")
-            return 1
-        print_success("Dependencies installed successfully")
+
+    # Stages are fingerprinted per ComfyUI directory
+    manifest = load_setup_manifest(manifest_path)
+    stages = manifest.setdefault(comfy_dir, {})
+    timings = []
+
+    def clone_fingerprint():
+        # A checkout of another branch is never up to date, so the switch is retried
+        if read_git_head(comfy_dir)[0] != args.branch:
+            return None
+        return {
+            "branch": args.branch,
+            "comfyui": list(read_git_head(comfy_dir)),
+            "manager": list(read_git_head(manager_dir))
+        }
+
+    def deps_fingerprint():
+        venv = venv_fingerprint(comfy_dir)
+        if venv is None:
+            return None
+        return {
+            "commit": read_git_head(comfy_dir)[1],
+            "lockfile": hash_file(os.path.join(comfy_dir, "uv.lock")),
+            "pyproject": hash_file(os.path.join(comfy_dir, "pyproject.toml")),
+            "extra": args.extra,
+            "venv": venv
+        }
+
+    try:
+        # Step 1: Clone ComfyUI and ComfyUI-Manager repositories
+        if not args.skip_clone:
+            print_step(1, "Cloning ComfyUI and ComfyUI-Manager repositories")
+            if not run_stage("clone", clone_fingerprint,
+                             lambda: clone_repositories(comfy_dir, args.branch, reference_dir, not args.full_clone),
+                             stages, timings, args.force):
+                return 1
+            print_success("Repositories cloned successfully")
+        
+        # Step 2: Create virtual environment
+        if not args.skip_venv:
+            print_step(2, "Creating virtual environment")
+            if not run_stage("venv", lambda: venv_fingerprint(comfy_dir), lambda: setup_venv(comfy_dir),
+                             stages, timings, args.force):
+                print_error("Failed to create virtual environment")
+                return 1
+            print_success("Virtual environment created successfully")
+        
+        # Step 3: Install dependencies
+        if not args.skip_deps:
+            print_step(3, "Installing dependencies")
+            if not run_stage("deps", deps_fingerprint, lambda: install_dependencies(comfy_dir, args.extra),
+                             stages, timings, args.force):
+                print_error("Failed to install dependencies")
+                return 1
+            print_success("Dependencies installed successfully")
+
+            # Step 4: Precompile ComfyUI sources
+            print_step(4, "Precompiling ComfyUI bytecode")
+            if not run_stage("bytecode", deps_fingerprint, lambda: precompile_comfyui(comfy_dir),
+                             stages, timings, args.force):
+                return 1
+            print_success("ComfyUI bytecode compiled successfully")
+    finally:
+        save_setup_manifest(manifest_path, manifest)
+        print_timings(timings)
     
     # Final message
     print_colored("\nSetup completed successfully!", Colors.GREEN + Colors.BOLD)
     print_colored("=" * 50, Colors.GREEN)
     
-    # Determine the Python executable path based on the platform
-    if platform.system() == "Windows":
-        python_path = os.path.join(comfy_dir, ".venv", "Scripts", "python.exe")
-    else:
-        python_path = os.path.join(comfy_dir, ".venv", "bin", "python")
-    
     print_colored("Next steps:", Colors.CYAN)
     print("1. Run the test script: uv run main.py")
     print_colored("=" * 50, Colors.GREEN)
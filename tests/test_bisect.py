@@ -0,0 +1,76 @@
+import unittest
+import os
+import subprocess
+import tempfile
+from bisect_comfyui import bisect_commits, judge_outcome, list_commits
+
+class TestBisect(unittest.TestCase):
+    def setUp(self):
+        self.commits = [f"c{i:02d}" for i in range(20)]
+
+    def make_test(self, first_bad, skip=()):
+        tested = []
+        def test(commit):
+            tested.append(commit)
+            if commit in skip:
+                return "skip"
+            return "bad" if self.commits.index(commit) >= first_bad else "good"
+        return test, tested
+
+    def test_finds_first_bad_commit(self):
+        """Test that bisection finds the first bad commit in log2(n) steps"""
+        for first_bad in (0, 7, 19):
+            test, tested = self.make_test(first_bad)
+            index, candidates = bisect_commits(self.commits, test)
+            self.assertEqual(index, first_bad)
+            self.assertEqual(candidates, [first_bad])
+            self.assertLessEqual(len(tested), 5)
+
+    def test_skipped_commits(self):
+        """Test that skipped commits are stepped around, and reported when they hide the answer"""
+        test, tested = self.make_test(7, skip={"c09"})
+        self.assertEqual(bisect_commits(self.commits, test)[0], 7)
+        self.assertIn("c09", tested)
+
+        test, _ = self.make_test(7, skip={"c06"})
+        self.assertEqual(bisect_commits(self.commits, test), (None, [6, 7]))
+
+    def test_verdicts_follow_the_bad_outcome(self):
+        """Test that only the failure seen at the bad commit counts as bad"""
+        self.assertEqual(judge_outcome("PASSED", "FAILED_NODE_NOT_FOUND"), "good")
+        self.assertEqual(judge_outcome("FAILED_NODE_NOT_FOUND", "FAILED_NODE_NOT_FOUND"), "bad")
+        self.assertEqual(judge_outcome("FAILED_INSTALL_NODE", "FAILED_NODE_NOT_FOUND"), "skip")
+        self.assertEqual(judge_outcome("UNEXPECTED_ERROR", "FAILED_NODE_NOT_FOUND"), "skip")
+        self.assertEqual(judge_outcome("FAILED_RESET_VENV", "FAILED_RESET_VENV"), "skip")
+        self.assertEqual(judge_outcome(None, None), "skip")
+
+    def test_commits_outside_a_shallow_single_branch_clone(self):
+        """Test that the history of the bisected branch is fetched into start.py's clones"""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        origin = os.path.join(tmp_dir.name, "origin")
+        clone = os.path.join(tmp_dir.name, "ComfyUI")
+
+        def run(*args, cwd=origin):
+            return subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=cwd, check=True, capture_output=True, text=True
+            ).stdout.strip()
+
+        os.makedirs(origin)
+        run("init", "-q", "-b", "master")
+        run("commit", "-q", "--allow-empty", "-m", "c0")
+        run("checkout", "-q", "-b", "rh-uvtest")
+        run("commit", "-q", "--allow-empty", "-m", "branch")
+        run("checkout", "-q", "master")
+        for i in range(1, 4):
+            run("commit", "-q", "--allow-empty", "-m", f"c{i}")
+        shas = run("rev-list", "--reverse", "master").split()
+        run("clone", "-q", "--depth", "1", "--single-branch", "--branch", "rh-uvtest", f"file://{origin}", clone, cwd=tmp_dir.name)
+
+        commits = list_commits(clone, shas[0], shas[3])
+        self.assertEqual(commits, [(shas[1], "c1"), (shas[2], "c2"), (shas[3], "c3")])
+        with self.assertRaises(RuntimeError):
+            list_commits(clone, shas[0], "0" * 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import os
+import subprocess
+import tempfile
+from cache_manager import disk_usage, discover_artifacts, plan_eviction, summarize_usage, env_cache_key, link_tree, store_env, verify_env, remove_tree
+
+class TestCacheManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.work_dir = self.tmp_dir.name
+        self.comfy_dir = os.path.join(self.work_dir, "ComfyUI")
+        self.ci_cache_dir = os.path.join(self.work_dir, ".ci_cache")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_file(self, path, size, mtime):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_hardlinks_are_counted_once(self):
+        """Test that hardlinked files do not inflate disk usage"""
+        path = self.write_file(os.path.join(self.work_dir, "a", "file"), 64 * 1024, 1)
+        usage_before = disk_usage(os.path.join(self.work_dir, "a"))
+        os.link(path, os.path.join(self.work_dir, "a", "link"))
+        self.assertEqual(disk_usage(os.path.join(self.work_dir, "a")), usage_before)
+
+    def test_usage_by_class_and_node(self):
+        """Test that artifacts are classified and attributed to nodes"""
+        self.write_file(os.path.join(self.comfy_dir, "custom_nodes", "comfy-mtb", "__init__.py"), 10, 1)
+        self.write_file(os.path.join(self.comfy_dir, "custom_nodes", "ComfyUI-Manager", "cm-cli.py"), 10, 1)
+        self.write_file(os.path.join(self.comfy_dir, "models", "checkpoints", "put_checkpoints_here"), 0, 1)
+        self.write_file(os.path.join(self.comfy_dir, "models", "checkpoints", "model.safetensors"), 10, 1)
+        self.write_file(os.path.join(self.work_dir, "logs", "20250101_000000", "comfy-mtb.jsonl.gz"), 10, 1)
+        self.write_file(os.path.join(self.work_dir, "comfyui_test_results_20250101_000000.json"), 10, 1)
+
+        summary = summarize_usage(discover_artifacts(self.comfy_dir, self.work_dir, self.ci_cache_dir))
+        self.assertEqual(summary["by_class"]["node_repos"]["count"], 1)
+        self.assertEqual(summary["by_class"]["models"]["count"], 1)
+        self.assertEqual(summary["by_class"]["logs"]["count"], 2)
+        self.assertEqual(list(summary["by_node"]), ["comfy-mtb"])
+
+    def test_tracked_model_files_are_not_artifacts(self):
+        """Test that files the ComfyUI checkout ships under models/ are never evicted"""
+        self.write_file(os.path.join(self.comfy_dir, "models", "configs", "v1-inference.yaml"), 10, 1)
+        self.write_file(os.path.join(self.comfy_dir, "models", "checkpoints", "put_checkpoints_here"), 0, 1)
+        git = ["git", "-C", self.comfy_dir, "-c", "user.name=ci", "-c", "user.email=ci@example.com"]
+        subprocess.run(git + ["init", "-q"], check=True)
+        subprocess.run(git + ["add", "-A"], check=True)
+        subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+        self.write_file(os.path.join(self.comfy_dir, "models", "configs", "downloaded.yaml"), 10, 1)
+        self.write_file(os.path.join(self.comfy_dir, "models", "checkpoints", "model.safetensors"), 10, 2)
+
+        artifacts = discover_artifacts(self.comfy_dir, self.work_dir, self.ci_cache_dir)
+        model_paths = sorted(os.path.relpath(a["path"], self.comfy_dir) for a in artifacts if a["class"] == "models")
+        self.assertEqual(model_paths, [
+            os.path.join("models", "checkpoints", "model.safetensors"),
+            os.path.join("models", "configs", "downloaded.yaml")
+        ])
+
+    def test_pip_cache_is_evicted_per_file(self):
+        """Test that the shared pip cache can shrink to its budget"""
+        pip_dir = os.path.join(self.ci_cache_dir, "pip")
+        old_wheel = self.write_file(os.path.join(pip_dir, "wheels", "ab", "cd", "old-1.0-py3-none-any.whl"), 64 * 1024, 1)
+        new_wheel = self.write_file(os.path.join(pip_dir, "wheels", "ef", "01", "new-1.0-py3-none-any.whl"), 64 * 1024, 2)
+
+        artifacts = [a for a in discover_artifacts(self.comfy_dir, self.work_dir, self.ci_cache_dir) if a["class"] == "pip_cache"]
+        self.assertEqual(sorted(a["path"] for a in artifacts), sorted([old_wheel, new_wheel]))
+        evicted = plan_eviction(artifacts, {"pip_cache": artifacts[0]["bytes"]})
+        self.assertEqual([a["path"] for a in evicted], [old_wheel])
+
+    def test_lru_eviction_respects_budget_and_protection(self):
+        """Test that the oldest unprotected artifacts are evicted first"""
+        artifacts = [
+            {"class": "models", "path": "/m/oldest", "node_id": None, "bytes": 100, "last_used": 1},
+            {"class": "models", "path": "/m/old", "node_id": None, "bytes": 100, "last_used": 2},
+            {"class": "models", "path": "/m/new", "node_id": None, "bytes": 100, "last_used": 3},
+            {"class": "logs", "path": "/l/old", "node_id": None, "bytes": 100, "last_used": 1}
+        ]
+        evicted = plan_eviction(artifacts, {"models": 150, "logs": 1000}, protected=["/m/oldest"])
+        self.assertEqual([a["path"] for a in evicted], ["/m/old", "/m/new"])
+
+        evicted = plan_eviction(artifacts, {"models": 200})
+        self.assertEqual([a["path"] for a in evicted], ["/m/oldest"])
+
+    def test_env_cache_key(self):
+        """Test that the key follows the lockfile and sync command only"""
+        comfy_dir = self.work_dir
+        with open(os.path.join(comfy_dir, "uv.lock"), "w") as f:
+            f.write("torch==2.6.0\n")
+        with open(os.path.join(comfy_dir, "nodes.py"), "w") as f:
+            f.write("# source\n")
+        key = env_cache_key(comfy_dir, "uv sync --extra cpu")
+
+        with open(os.path.join(comfy_dir, "nodes.py"), "a") as f:
+            f.write("# changed\n")
+        self.assertEqual(env_cache_key(comfy_dir, "uv sync --extra cpu"), key)
+        self.assertNotEqual(env_cache_key(comfy_dir, "uv sync --extra cu126"), key)
+        with open(os.path.join(comfy_dir, "uv.lock"), "w") as f:
+            f.write("torch==2.7.0\n")
+        self.assertNotEqual(env_cache_key(comfy_dir, "uv sync --extra cpu"), key)
+
+    def test_link_tree_hardlinks_files(self):
+        """Test that a restored environment shares files with the cache"""
+        src = os.path.join(self.work_dir, "cache", "env")
+        dst = os.path.join(self.work_dir, "ComfyUI", ".venv")
+        os.makedirs(os.path.join(src, "lib"))
+        with open(os.path.join(src, "lib", "module.py"), "w") as f:
+            f.write("x = 1\n")
+        os.makedirs(os.path.join(dst, "stale"))
+
+        link_tree(src, dst)
+        self.assertFalse(os.path.exists(os.path.join(dst, "stale")))
+        self.assertTrue(os.path.samefile(os.path.join(src, "lib", "module.py"), os.path.join(dst, "lib", "module.py")))
+
+    def test_cached_env_is_verified(self):
+        """Test that in-place writes through a restored venv are detected"""
+        venv = os.path.join(self.work_dir, "ComfyUI", ".venv")
+        cache_path = os.path.join(self.ci_cache_dir, "envs", "key")
+        module = self.write_file(os.path.join(venv, "lib", "module.py"), 10, 1)
+        os.makedirs(os.path.dirname(cache_path))
+        store_env(venv, cache_path)
+        self.assertTrue(verify_env(cache_path))
+        # The live venv stays writable
+        self.assertTrue(os.stat(module).st_mode & 0o200)
+
+        with open(module, "a") as f:
+            f.write("patched = True\n")
+        self.assertFalse(verify_env(cache_path))
+
+    def test_remove_tree_deletes_read_only_files(self):
+        """Test that read-only files left by older caches do not block deletion"""
+        path = self.write_file(os.path.join(self.work_dir, "env", "lib", "module.py"), 10, 1)
+        os.chmod(path, 0o444)
+        remove_tree(os.path.join(self.work_dir, "env"))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "env")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import tempfile
+from footprint import snapshot_distributions, freeze, build_footprint, rank_footprints
+
+class TestFootprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.site_packages = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def install(self, name, version, size):
+        dist_info = os.path.join(self.site_packages, f"{name}-{version}.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "RECORD"), "w") as f:
+            f.write(f"{name}/__init__.py,sha256=abc,{size}\n{name}-{version}.dist-info/RECORD,,\n")
+
+    def uninstall(self, name, version):
+        dist_info = os.path.join(self.site_packages, f"{name}-{version}.dist-info")
+        os.remove(os.path.join(dist_info, "RECORD"))
+        os.rmdir(dist_info)
+
+    def test_snapshot_and_freeze(self):
+        """Test that dist-info folders are read into pinned requirements"""
+        self.install("numpy", "2.2.0", 1000)
+        self.install("typing_extensions", "4.12.2", 10)
+        self.assertEqual(freeze(snapshot_distributions(self.site_packages)), ["numpy==2.2.0", "typing_extensions==4.12.2"])
+
+    def test_footprint_diff(self):
+        """Test added packages, up/downgrades, torch variant swaps and install log parsing"""
+        self.install("numpy", "2.2.0", 1000)
+        self.install("torch", "2.6.0+cu126", 5000)
+        self.install("pillow", "10.0.0", 300)
+        before = snapshot_distributions(self.site_packages)
+
+        self.uninstall("numpy", "2.2.0")
+        self.install("numpy", "1.26.4", 900)
+        self.uninstall("torch", "2.6.0+cu126")
+        self.install("torch", "2.6.0+cpu", 2000)
+        self.uninstall("pillow", "10.0.0")
+        self.install("pillow", "11.0.0", 350)
+        self.install("insightface", "0.7.3", 400)
+        install_log = " Downloading torch (1.5GiB)\n Downloading insightface (1.0MiB)\nBuilding insightface==0.7.3\n"
+
+        footprint = build_footprint(before, snapshot_distributions(self.site_packages), install_log)
+        self.assertEqual(footprint["added"], {"insightface": "0.7.3"})
+        self.assertEqual(footprint["upgraded"], {"pillow": ["10.0.0", "11.0.0"]})
+        self.assertEqual(footprint["downgraded"], {"numpy": ["2.2.0", "1.26.4"]})
+        self.assertEqual(footprint["changed"], {"torch": ["2.6.0+cu126", "2.6.0+cpu"]})
+        self.assertEqual(footprint["bytes_added"], 400 - 100 - 3000 + 50)
+        self.assertEqual(footprint["download_bytes"], int(1.5 * 1024 ** 3) + 1024 ** 2)
+        self.assertEqual(footprint["built_from_source"], ["insightface"])
+        self.assertEqual(set(footprint["key_package_changes"]), {"numpy", "torch"})
+        self.assertEqual(footprint["key_package_changes"]["numpy"]["change"], "downgraded")
+
+    def test_ranking(self):
+        """Test that nodes are ranked by bytes added"""
+        small = build_footprint({}, {"a": {"name": "a", "version": "1", "bytes": 10}})
+        large = build_footprint({}, {"b": {"name": "b", "version": "1", "bytes": 1000}})
+        ranking = rank_footprints([
+            {"node_name": "small-node", "footprint": small},
+            {"node_name": "large-node", "footprint": large},
+            {"node_name": "failed-node"}
+        ])
+        self.assertEqual([r["node_name"] for r in ranking], ["large-node", "small-node"])
+
+if __name__ == '__main__':
+    unittest.main()
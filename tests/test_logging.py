@@ -0,0 +1,50 @@
+import unittest
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+import main
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_filename = os.path.join(self.tmp_dir.name, "comfyui_test_log_run.jsonl")
+        self.node_log_dir = os.path.join(self.tmp_dir.name, "logs", "run")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_jsonl_gz(self, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def test_colors_stay_out_of_log_files(self):
+        """Test that a colored message reaches the files as plain JSON lines with node and step"""
+        console = io.StringIO()
+        with mock.patch.object(main, "log_filename", self.log_filename), \
+                mock.patch.object(main, "NODE_LOG_DIR", self.node_log_dir), \
+                mock.patch("sys.stdout", console):
+            main.setup_logging()
+            try:
+                main.set_log_context(node_id="comfy-mtb@latest+cpu", step="install_node")
+                main.log_success("Node installed")
+                main.close_node_log("comfy-mtb@latest+cpu")
+            finally:
+                main.set_log_context()
+                main.shutdown_logging()
+
+        self.assertIn("\x1b[", console.getvalue())
+        node_log = os.path.join(self.node_log_dir, "comfy-mtb@latest+cpu.jsonl")
+        self.assertFalse(os.path.exists(node_log))
+        self.assertFalse(os.path.exists(self.log_filename))
+        for path in (f"{node_log}.gz", f"{self.log_filename}.gz"):
+            text = self.read_jsonl_gz(path)
+            self.assertNotIn("\x1b[", text)
+            entry = json.loads(text.splitlines()[0])
+            self.assertEqual(entry["message"], "✓ Node installed")
+            self.assertEqual((entry["node_id"], entry["step"]), ("comfy-mtb@latest+cpu", "install_node"))
+
+if __name__ == '__main__':
+    unittest.main()
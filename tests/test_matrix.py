@@ -0,0 +1,42 @@
+import unittest
+from matrix import expand_matrix, schedule_matrix, install_spec, result_key
+
+class TestMatrix(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [
+            {"id": "comfyui-impact-pack", "versions": ["latest", "nightly", "8.8.1"], "extras": ["cu126", "cpu"]},
+            {"id": "comfyui-kjnodes"},
+            {"id": "comfyui-impact-pack", "versions": ["nightly"], "extras": ["cpu"]}
+        ]
+
+    def test_expand_matrix(self):
+        """Test that entries expand into unique (node, version, extra) cells"""
+        cells = expand_matrix(self.nodes, "cu126")
+        self.assertEqual(len(cells), 7)
+        self.assertIn({"id": "comfyui-kjnodes", "version": "latest", "extra": "cu126"}, cells)
+
+    def test_schedule_groups_by_extra_then_node(self):
+        """Test that cells sharing a base environment run back to back"""
+        cells = schedule_matrix(expand_matrix(self.nodes, "cu126"))
+        self.assertEqual([(c["id"], c["version"], c["extra"]) for c in cells], [
+            ("comfyui-impact-pack", "latest", "cu126"),
+            ("comfyui-impact-pack", "nightly", "cu126"),
+            ("comfyui-impact-pack", "8.8.1", "cu126"),
+            ("comfyui-kjnodes", "latest", "cu126"),
+            ("comfyui-impact-pack", "latest", "cpu"),
+            ("comfyui-impact-pack", "nightly", "cpu"),
+            ("comfyui-impact-pack", "8.8.1", "cpu")
+        ])
+
+    def test_install_spec_and_result_key(self):
+        """Test the cm-cli install argument and keys of old and new results"""
+        self.assertEqual(install_spec("comfyui-kjnodes", "latest"), "comfyui-kjnodes")
+        self.assertEqual(install_spec("comfyui-kjnodes", "nightly"), "comfyui-kjnodes@nightly")
+        self.assertEqual(result_key({"node_name": "comfyui-kjnodes"}), ("comfyui-kjnodes", "latest", None))
+        self.assertEqual(
+            result_key({"node_name": "comfyui-kjnodes", "version": "1.0.0", "extra": "cpu"}),
+            ("comfyui-kjnodes", "1.0.0", "cpu")
+        )
+
+if __name__ == '__main__':
+    unittest.main()
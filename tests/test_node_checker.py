@@ -1,7 +1,11 @@
 import unittest
 import json
 import os
-from main import check_node_in_object_info
+import subprocess
+import tempfile
+from unittest import mock
+import main
+from main import build_install_manifest, build_module_index, check_node_in_object_info, find_node_entries
 
 class TestNodeChecker(unittest.TestCase):
     def setUp(self):
@@ -31,5 +35,74 @@ class TestNodeChecker(unittest.TestCase):
         self.assertFalse(found)
         self.assertEqual(details, "No matching entries found in object_info")
 
+    def relabel(self, old_module, new_module):
+        """Copy of the sample with one module's python_module rewritten"""
+        return {
+            name: dict(data, python_module=new_module) if data.get("python_module") == old_module else data
+            for name, data in self.sample_object_info.items()
+        }
+
+    def test_case_insensitive_match(self):
+        """Test that a mixed-case directory matches a lowercase registry id"""
+        object_info = self.relabel("custom_nodes.comfyui_ipadapter_plus", "custom_nodes.ComfyUI_IPAdapter_plus")
+        found, details = check_node_in_object_info("comfyui_ipadapter_plus", object_info)
+        self.assertTrue(found)
+        self.assertIn("IPAdapterAdvanced", details)
+
+    def test_submodule_match(self):
+        """Test that classes registered from a submodule count for the package"""
+        object_info = self.relabel("custom_nodes.comfyui_ipadapter_plus", "custom_nodes.comfyui_ipadapter_plus.nodes")
+        entries = find_node_entries("comfyui_ipadapter_plus", object_info)
+        self.assertEqual(len(entries), 30)
+        self.assertTrue(all(e["python_module"] == "custom_nodes.comfyui_ipadapter_plus.nodes" for e in entries))
+
+    def test_manifest_module_names(self):
+        """Test matching through the installed directory when it differs from the id"""
+        object_info = self.relabel("custom_nodes.comfyui_ipadapter_plus", "custom_nodes.ComfyUI_IPAdapter_plus")
+        self.assertEqual(find_node_entries("ipadapter-plus", object_info), [])
+        index = build_module_index(object_info)
+        entries = find_node_entries("ipadapter-plus", object_info, ["custom_nodes.ComfyUI_IPAdapter_plus"], index)
+        self.assertEqual(len(entries), 30)
+        # The id and the manifest naming the same module must not double count
+        entries = find_node_entries("comfyui_ipadapter_plus", object_info, ["custom_nodes.ComfyUI_IPAdapter_plus"], index)
+        self.assertEqual(len(entries), 30)
+
+    def test_directory_name_with_dots(self):
+        """Test that a node directory whose name contains dots is matched as a whole"""
+        object_info = self.relabel("custom_nodes.comfyui_ipadapter_plus", "custom_nodes.ComfyUI-IPAdapter.v2.nodes")
+        entries = find_node_entries("ipadapter-v2", object_info, ["custom_nodes.ComfyUI-IPAdapter.v2"])
+        self.assertEqual(len(entries), 30)
+        self.assertEqual(find_node_entries("ipadapter-v2", object_info, ["custom_nodes.ComfyUI-IPAdapter.v"]), [])
+
+    def test_module_index_skips_core_nodes(self):
+        """Test that only custom_nodes packages are indexed"""
+        index = build_module_index(self.sample_object_info)
+        self.assertEqual(sorted(index), ["custom_nodes.comfyui_ipadapter_plus", "custom_nodes.websocket_image_save"])
+        self.assertFalse(any(e["python_module"].startswith("comfy_extras.") for entries in index.values() for e in entries))
+
+    def test_install_manifest(self):
+        """Test the manifest of a cloned node directory"""
+        with tempfile.TemporaryDirectory() as comfyui_dir:
+            node_dir = os.path.join(comfyui_dir, "custom_nodes", "ComfyUI-Example")
+            os.makedirs(os.path.join(node_dir, "nodes", "__pycache__"))
+            for path in ("__init__.py", "nodes/sampler.py", "nodes/__pycache__/sampler.cpython-312.pyc"):
+                with open(os.path.join(node_dir, path), "w") as f:
+                    f.write("")
+            git = ["git", "-C", node_dir, "-c", "user.name=ci", "-c", "user.email=ci@example.com"]
+            subprocess.run(git + ["init", "-q", "-b", "main"], check=True)
+            subprocess.run(git + ["add", "-A"], check=True)
+            subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+            commit = subprocess.run(git + ["rev-parse", "HEAD"], check=True, capture_output=True, text=True).stdout.strip()
+
+            with mock.patch.object(main, "COMFYUI_DIR", comfyui_dir):
+                manifest = build_install_manifest({"ComfyUI-Example"})
+        self.assertEqual(manifest, {"node_dirs": [{
+            "name": "ComfyUI-Example",
+            "module": "custom_nodes.ComfyUI-Example",
+            "branch": "main",
+            "commit": commit,
+            "files": ["__init__.py", "nodes/sampler.py"]
+        }]})
+
 if __name__ == '__main__':
     unittest.main() 
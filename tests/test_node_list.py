@@ -0,0 +1,151 @@
+import unittest
+import argparse
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import main
+from node_list import fetch_pages, fetch_source, load_node_list, normalize_repository, parse_nodes, select_nodes, with_repositories, NodeListUnavailable
+
+class TestNodeList(unittest.TestCase):
+    def setUp(self):
+        # Local stand-in for the registry
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        self.sample_file_path = os.path.join(test_dir, 'registry_nodes.json')
+        with open(self.sample_file_path, 'rb') as f:
+            self.sample_body = f.read()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_local_file_selection(self):
+        """Test --top, popularity cutoff and dedup by repository on a local source"""
+        nodes, origin = load_node_list(self.sample_file_path, self.tmp_dir.name, top=5, min_downloads=100)
+        self.assertEqual(origin, "file")
+        self.assertEqual([n["id"] for n in nodes], [
+            "comfyui-impact-pack", "comfyui-kjnodes", "comfyui-videohelpersuite", "comfyui-reactor", "comfyui-wanvideowrapper"
+        ])
+
+        nodes = select_nodes(parse_nodes(json.loads(self.sample_body)))
+        ids = [n["id"] for n in nodes]
+        self.assertIn("teacache", ids)
+        self.assertNotIn("teacachehunyuanvideo", ids)
+        self.assertNotIn("comfyui-reactor-node", ids)
+        self.assertIn("comfyui-tiny-experiment", ids)
+
+    def test_include_exclude(self):
+        """Test fnmatch filters on node ids"""
+        nodes, _ = load_node_list(self.sample_file_path, include=["*video*", "teacache*"], exclude=["*wrapper"])
+        self.assertEqual([n["id"] for n in nodes], ["comfyui-videohelpersuite", "teacache"])
+
+    def test_normalize_repository(self):
+        """Test that URL spellings of one repository compare equal"""
+        self.assertEqual(normalize_repository("git@github.com:welltop-cn/ComfyUI-TeaCache.git"), "github.com/welltop-cn/comfyui-teacache")
+        self.assertEqual(normalize_repository("https://www.github.com/welltop-cn/ComfyUI-TeaCache/"), "github.com/welltop-cn/comfyui-teacache")
+
+    def test_entries_without_repository(self):
+        """Test that TOP_NODES-style entries keep their order and extra keys"""
+        nodes = select_nodes([{"id": "b", "versions": ["nightly"]}, {"id": "a"}, {"id": "b"}])
+        self.assertEqual(nodes, [{"id": "b", "versions": ["nightly"]}, {"id": "a"}])
+
+    def test_top_nodes_dedup_through_registry(self):
+        """Test that TOP_NODES ids of one repository are tested once"""
+        top_nodes = [{"id": "comfyui-reactor", "versions": ["nightly"]}, {"id": "comfyui-reactor-node"}, {"id": "teacache"},
+                     {"id": "teacachehunyuanvideo"}, {"id": "comfyui-local-only"}]
+        entries = with_repositories(top_nodes, parse_nodes(json.loads(self.sample_body)))
+        self.assertEqual([n["id"] for n in select_nodes(entries)], ["comfyui-reactor", "teacache", "comfyui-local-only"])
+        self.assertEqual(entries[0]["versions"], ["nightly"])
+        self.assertNotIn("repository", top_nodes[0])
+
+    def test_top_nodes_fallback_ignores_popularity_cutoff(self):
+        """Test that entries without download counts survive --min-downloads"""
+        args = argparse.Namespace(
+            node_source=os.path.join(self.tmp_dir.name, "missing.json"), top=100, include=[], exclude=[], min_downloads=1000
+        )
+        with mock.patch.object(main, "fetch_pages", side_effect=NodeListUnavailable("offline")):
+            nodes = main.resolve_node_list(args)
+        self.assertEqual(len(nodes), min(100, len(main.TOP_NODES)))
+
+        nodes = select_nodes([{"id": "a"}, {"id": "b", "downloads": 10}, {"id": "c", "downloads": 5000}], min_downloads=1000)
+        self.assertEqual([n["id"] for n in nodes], ["c", "a"])
+
+    def test_paged_registry(self):
+        """Test that all pages of a registry response are fetched and cached"""
+        nodes = json.loads(self.sample_body)["nodes"]
+        pages_seen = []
+
+        class PagedHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = int(self.path.split("page=")[1].split("&")[0])
+                pages_seen.append(page)
+                body = json.dumps({"nodes": nodes[(page - 1) * 4:page * 4], "page": page, "limit": 4, "totalPages": 3}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PagedHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/nodes?page=1&limit=4"
+        try:
+            data, origin = fetch_pages(url, self.tmp_dir.name)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual((origin, pages_seen), ("downloaded", [1, 2, 3]))
+        self.assertEqual(len(parse_nodes(data)), 9)
+
+        data, origin = fetch_pages(url, self.tmp_dir.name, timeout=2)
+        self.assertEqual((origin, len(parse_nodes(data))), ("offline-cache", 9))
+
+    def test_remote_source_revalidation_and_offline_fallback(self):
+        """Test the on-disk cache: conditional requests, 304 handling and offline fallback"""
+        requests_seen = []
+        body = self.sample_body
+
+        class RegistryHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests_seen.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), RegistryHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/nodes"
+        try:
+            data, origin = fetch_source(url, self.tmp_dir.name)
+            self.assertEqual(origin, "downloaded")
+            self.assertEqual(len(parse_nodes(data)), 9)
+            data, origin = fetch_source(url, self.tmp_dir.name)
+            self.assertEqual(origin, "not-modified")
+            self.assertEqual(len(parse_nodes(data)), 9)
+            self.assertEqual(requests_seen, [None, '"v1"'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        data, origin = fetch_source(url, self.tmp_dir.name, timeout=2)
+        self.assertEqual(origin, "offline-cache")
+        self.assertEqual(len(parse_nodes(data)), 9)
+        with self.assertRaises(NodeListUnavailable):
+            fetch_source(url, os.path.join(self.tmp_dir.name, "empty"), timeout=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import urllib.request
+from progress import ProgressTracker, start_progress_server
+
+class TestProgress(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ProgressTracker()
+        self.tracker.start_run(
+            [("a@latest+cpu", "a"), ("b@latest+cpu", "b"), ("c@latest+cpu", "c")],
+            {"a": 100.0, "b@latest+cpu": 300.0}
+        )
+
+    def finish(self, outcome, step_timings):
+        self.tracker.finish_cell({"final_outcome": outcome, "step_timings": step_timings})
+
+    def test_eta_uses_history_then_run_average(self):
+        """Test the ETA from historical durations, falling back to this run's mean"""
+        self.assertIsNone(self.tracker.status()["current_cell"])
+        self.assertEqual(self.tracker.status()["eta_seconds"], 100.0 + 300.0 + 200.0)
+
+        self.tracker.start_cell("a@latest+cpu", "a")
+        self.tracker.set_step("install_node")
+        status = self.tracker.status()
+        self.assertEqual((status["current_node"], status["current_step"]), ("a", "install_node"))
+        self.assertAlmostEqual(status["eta_seconds"], 600.0, places=0)
+
+        self.finish("PASSED", {"install_node": 20.0, "start_comfyui": 4.0})
+        self.tracker.start_cell("b@latest+cpu", "b")
+        status = self.tracker.status(now=self.tracker.cell_started + 50)
+        # b has 250s left; c has no history and uses the mean of finished cells (~0s here)
+        self.assertAlmostEqual(status["eta_seconds"], 250.0, places=0)
+        self.assertEqual((status["completed"], status["passed"], status["failed"]), (1, 1, 0))
+
+    def test_metrics_histogram(self):
+        """Test the Prometheus histogram is cumulative per step"""
+        self.finish("PASSED", {"install_node": 20.0})
+        self.finish("FAILED_START_COMFY", {"install_node": 400.0})
+        metrics = self.tracker.render_metrics()
+        self.assertIn('node_ci_step_duration_seconds_bucket{step="install_node",le="30"} 1', metrics)
+        self.assertIn('node_ci_step_duration_seconds_bucket{step="install_node",le="600"} 2', metrics)
+        self.assertIn('node_ci_step_duration_seconds_count{step="install_node"} 2', metrics)
+        self.assertIn("# TYPE node_ci_cells_failed_total counter", metrics)
+        self.assertIn("node_ci_cells_failed_total 1", metrics)
+        self.assertIn("node_ci_cells_passed_total 1", metrics)
+        self.assertEqual(metrics.count("# TYPE node_ci_step_duration_seconds histogram"), 1)
+
+    def test_http_endpoints(self):
+        """Test that /status and /metrics are served from a background thread"""
+        server = start_progress_server(self.tracker, port=0)
+        try:
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base_url}/status", timeout=5) as response:
+                self.assertEqual(json.load(response)["total"], 3)
+            with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+                self.assertIn("node_ci_cells 3", response.read().decode("utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
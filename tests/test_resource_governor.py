@@ -0,0 +1,64 @@
+import unittest
+import subprocess
+import sys
+from unittest import mock
+import resource_governor
+from resource_governor import ResourceGovernor
+
+@unittest.skipIf(sys.platform == "win32", "Resource limits are not applied on Windows")
+class TestResourceGovernor(unittest.TestCase):
+    def run_governed(self, governor, code):
+        cmd = governor.wrap_command(f'"{sys.executable}" -c "{code}"')
+        with governor.measure():
+            process = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        governor.note_exit(process.returncode, process.stderr)
+        return process
+
+    def test_rlimit_memory_limit(self):
+        """Test that an allocation above the memory limit is reported"""
+        governor = ResourceGovernor("greedy-node", {"memory_bytes": 256 * 1024 ** 2}, use_cgroup=False)
+        process = self.run_governed(governor, "x = bytearray(1024 ** 3)")
+        self.assertNotEqual(process.returncode, 0)
+        self.assertEqual(governor.usage()["limit_exceeded"], "memory")
+
+    def test_rlimit_cpu_limit(self):
+        """Test that a busy loop is stopped by the CPU time limit"""
+        governor = ResourceGovernor("busy-node", {"cpu_seconds": 1}, use_cgroup=False)
+        self.run_governed(governor, "while True: pass")
+        usage = governor.usage()
+        self.assertEqual(usage["limit_exceeded"], "cpu")
+        self.assertGreaterEqual(usage["cpu_seconds"], 0.9)
+
+    def test_within_limits(self):
+        """Test that a well-behaved command passes and reports usage"""
+        governor = ResourceGovernor("nice-node", {"memory_bytes": 1024 ** 3, "cpu_seconds": 60}, use_cgroup=False)
+        process = self.run_governed(governor, "print(sum(range(1000)))")
+        self.assertEqual(process.stdout.strip(), "499500")
+        usage = governor.usage()
+        self.assertIsNone(usage["limit_exceeded"])
+        self.assertEqual(usage["backend"], "rlimit")
+    def test_limits_are_clamped_to_hard_limits(self):
+        """Test that soft limits never exceed what an unprivileged user may set"""
+        governor = ResourceGovernor("forky-node", {"pids": 4096}, use_cgroup=False)
+        with mock.patch.object(resource_governor.resource, "getrlimit", return_value=(2000, 2666)):
+            cmd = governor.wrap_command("true")
+        self.assertIn(f"ulimit -S {resource_governor.NPROC_ULIMIT_FLAG} 2666", cmd)
+
+    def test_failed_prelude_still_runs_command(self):
+        """Test that a limit the shell refuses only produces a warning"""
+        governor = ResourceGovernor("forky-node", {"pids": 4096}, use_cgroup=False)
+        with mock.patch.object(resource_governor, "NPROC_ULIMIT_FLAG", "-Z"):
+            process = self.run_governed(governor, "print('ran')")
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(process.stdout.strip(), "ran")
+        self.assertIn("could not apply", process.stderr)
+
+    def test_usage_only_counts_governed_commands(self):
+        """Test that children reaped outside measure() are not attributed to the node"""
+        governor = ResourceGovernor("quiet-node", {}, use_cgroup=False)
+        subprocess.run([sys.executable, "-c", "sum(i * i for i in range(10 ** 7))"], check=True)
+        self.run_governed(governor, "pass")
+        self.assertLess(governor.usage()["cpu_seconds"], 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
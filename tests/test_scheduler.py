@@ -0,0 +1,63 @@
+import unittest
+import json
+import os
+import tempfile
+from scheduler import jaccard_distance, load_requirement_history, order_by_similarity, schedule_report
+
+FACE_STACK = {"insightface==0.7.3", "onnxruntime==1.20.1", "opencv-python==4.10.0.84"}
+VIDEO_STACK = {"imageio-ffmpeg==0.5.1", "av==13.1.0", "decord==0.6.0"}
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.requirements = {
+            "comfyui_instantid": FACE_STACK | {"timm==1.0.12"},
+            "comfyui-wanvideowrapper": VIDEO_STACK | {"ftfy==6.3.1"},
+            "comfyui_pulid_flux_ll": FACE_STACK | {"facexlib==0.3.0"},
+            "comfyui-hunyuanvideowrapper": VIDEO_STACK,
+            "comfyui-reactor": FACE_STACK
+        }
+        self.list_order = list(self.requirements) + ["comfyui-new-node"]
+
+    def test_jaccard_distance(self):
+        """Test distance bounds and the empty case"""
+        self.assertEqual(jaccard_distance(FACE_STACK, FACE_STACK), 0.0)
+        self.assertEqual(jaccard_distance(FACE_STACK, VIDEO_STACK), 1.0)
+        self.assertEqual(jaccard_distance(set(), set()), 0.0)
+        self.assertAlmostEqual(jaccard_distance({"a==1", "b==1"}, {"a==1", "c==1"}), 2 / 3)
+
+    def test_groups_run_back_to_back(self):
+        """Test that shared stacks are grouped and unknown nodes run last"""
+        order = order_by_similarity(self.list_order, self.requirements)
+        self.assertEqual(order, [
+            "comfyui_instantid", "comfyui-reactor", "comfyui_pulid_flux_ll",
+            "comfyui-wanvideowrapper", "comfyui-hunyuanvideowrapper", "comfyui-new-node"
+        ])
+
+        report = schedule_report(self.list_order, order, self.requirements)
+        self.assertEqual(report["list_order_installs"], 18)
+        self.assertEqual(report["scheduled_installs"], 9)
+        self.assertEqual(report["installs_saved"], 9)
+        self.assertEqual(report["nodes_without_history"], ["comfyui-new-node"])
+
+    def test_load_history_prefers_newest_results(self):
+        """Test that requirements come from the newest results file with a footprint"""
+        def footprint(added, upgraded=None):
+            return {"added": added, "upgraded": upgraded or {}, "downgraded": {}, "changed": {}}
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            runs = {
+                "20250101_000000": [{"node_name": "comfyui-reactor", "footprint": footprint({"insightface": "0.7.2"})}],
+                "20250102_000000": [
+                    {"node_name": "comfyui-reactor", "footprint": footprint({"Insightface": "0.7.3"}, {"numpy": ["1.26.4", "2.1.0"]})},
+                    {"node_name": "comfyui-kjnodes"}
+                ]
+            }
+            for run_id, results in runs.items():
+                with open(os.path.join(work_dir, f"comfyui_test_results_{run_id}.json"), "w") as f:
+                    json.dump(results, f)
+
+            history = load_requirement_history(work_dir)
+        self.assertEqual(history, {"comfyui-reactor": {"insightface==0.7.3", "numpy==2.1.0"}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from smoke import build_primitive_value, build_smoke_workflow, classify_execution_error, compare_smoke_latencies, run_smoke_tests
+
+class TestSmokeWorkflows(unittest.TestCase):
+    def setUp(self):
+        # Load sample object_info response from JSON file
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        sample_file_path = os.path.join(test_dir, 'object_info.json')
+
+        with open(sample_file_path, 'r') as f:
+            self.sample_object_info = json.load(f)
+
+    def test_primitive_values(self):
+        """Test defaults, min/max clamping and enums"""
+        self.assertEqual(build_primitive_value(["INT", {"default": 20, "min": 1}]), (True, 20))
+        self.assertEqual(build_primitive_value(["INT", {"min": 1, "max": 10}]), (True, 1))
+        self.assertEqual(build_primitive_value(["FLOAT", {"default": -5.0, "min": 0.0}]), (True, 0.0))
+        self.assertEqual(build_primitive_value(["STRING", {"multiline": True}]), (True, ""))
+        self.assertEqual(build_primitive_value([["euler", "heun"], {"default": "heun"}]), (True, "heun"))
+        self.assertEqual(build_primitive_value(["COMBO", {"options": ["a", "b"]}]), (True, "a"))
+        self.assertEqual(build_primitive_value([[], {}]), (False, None))
+        self.assertEqual(build_primitive_value(["MODEL"]), (False, None))
+
+    def test_node_with_model_input_is_skipped(self):
+        """Test that nodes needing models are not executed"""
+        prompt, reason = build_smoke_workflow("KSampler", self.sample_object_info)
+        self.assertIsNone(prompt)
+        self.assertTrue(reason)
+
+    def test_image_output_is_wired_into_preview(self):
+        """Test that a primitive-only node gets a core output node attached"""
+        prompt, _ = build_smoke_workflow("IPAdapterNoise", self.sample_object_info)
+        self.assertEqual(prompt["1"]["class_type"], "IPAdapterNoise")
+        self.assertEqual(prompt["1"]["inputs"]["type"], "fade")
+        self.assertEqual(prompt["2"], {"class_type": "PreviewImage", "inputs": {"images": ["1", 0]}})
+
+    def serve(self, reject_classes=()):
+        """Start a stand-in ComfyUI server whose prompts never finish"""
+        requests_seen = []
+
+        class ComfyHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                requests_seen.append((self.path, body))
+                if self.path == "/prompt" and body["prompt"]["1"]["class_type"] in reject_classes:
+                    self.reply(400, {"error": "invalid default"})
+                else:
+                    self.reply(200, {"prompt_id": "p1"} if self.path == "/prompt" else {})
+
+            def do_GET(self):
+                self.reply(200, {})
+
+            def reply(self, code, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ComfyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}", requests_seen
+
+    def test_timeout_cancels_prompt_and_stops(self):
+        """Test that a hung prompt is interrupted and the node's other classes are not queued behind it"""
+        base_url, requests_seen = self.serve()
+        results = run_smoke_tests(base_url, ["IPAdapterNoise", "IPAdapterWeights"], self.sample_object_info, timeout=0.3)
+        self.assertEqual(results["IPAdapterNoise"]["failure"], "timeout")
+        self.assertTrue(results["IPAdapterWeights"]["skipped"])
+        self.assertEqual([path for path, _ in requests_seen], ["/prompt", "/queue", "/interrupt", "/queue"])
+        self.assertEqual(requests_seen[-1][1], {"clear": True})
+
+    def test_rejected_prompt_is_not_a_crash(self):
+        """Test that a validation rejection is told apart from an execution error"""
+        base_url, _ = self.serve(reject_classes=("IPAdapterNoise",))
+        results = run_smoke_tests(base_url, ["IPAdapterNoise"], self.sample_object_info, timeout=0.3)
+        self.assertEqual(results["IPAdapterNoise"]["failure"], "rejected")
+        self.assertFalse(results["IPAdapterNoise"]["success"])
+
+    def test_only_crashes_in_node_code_are_failures(self):
+        """Test that errors caused by the generated inputs are told apart from node crashes"""
+        def error(exception_type, frame, node_type="IPAdapterNoise"):
+            return {
+                "node_type": node_type,
+                "exception_type": exception_type,
+                "traceback": [
+                    '  File "/ci/ComfyUI/execution.py", line 496, in execute\n',
+                    f'  File "{frame}", line 12, in run\n'
+                ]
+            }
+
+        node_frame = "/ci/ComfyUI/custom_nodes/ComfyUI_IPAdapter_plus/utils.py"
+        self.assertEqual(classify_execution_error(error("ZeroDivisionError", node_frame), "IPAdapterNoise"), "execution_error")
+        self.assertEqual(classify_execution_error(error("FileNotFoundError", node_frame), "IPAdapterNoise"), "input_error")
+        self.assertEqual(
+            classify_execution_error(error("requests.exceptions.ConnectionError", node_frame), "IPAdapterNoise"), "input_error"
+        )
+        self.assertEqual(classify_execution_error(error("RuntimeError", "/ci/ComfyUI/nodes.py"), "IPAdapterNoise"), "input_error")
+        self.assertEqual(
+            classify_execution_error(error("RuntimeError", node_frame, "PreviewImage"), "IPAdapterNoise"), "input_error"
+        )
+
+    def test_latency_regressions(self):
+        """Test that only significant slowdowns are reported"""
+        def run(latencies):
+            return [{
+                "node_name": "comfyui_ipadapter_plus",
+                "steps": {"smoke_test": {"node_classes": {
+                    name: {"skipped": False, "success": True, "latency_seconds": latency}
+                    for name, latency in latencies.items()
+                }}}
+            }]
+
+        regressions = compare_smoke_latencies(
+            run({"IPAdapterNoise": 1.0, "IPAdapterWeights": 0.1}),
+            run({"IPAdapterNoise": 3.0, "IPAdapterWeights": 0.3})
+        )
+        self.assertEqual([r["node_class"] for r in regressions], ["IPAdapterNoise"])
+
+if __name__ == '__main__':
+    unittest.main()
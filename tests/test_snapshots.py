@@ -0,0 +1,105 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from snapshots import snapshot_object_info, diff_manifests, list_runs, list_cells, load_manifest, load_snapshot, pair_snapshots
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        # Load sample object_info response from JSON file
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        sample_file_path = os.path.join(test_dir, 'object_info.json')
+
+        with open(sample_file_path, 'r') as f:
+            self.sample_object_info = json.load(f)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def count_objects(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.store_dir, "objects")))
+
+    def test_unchanged_runs_are_deduplicated(self):
+        """Test that a second identical run only adds a manifest"""
+        _, new_objects = snapshot_object_info(self.sample_object_info, "run1", self.store_dir)
+        self.assertEqual(new_objects, len(self.sample_object_info))
+        _, new_objects = snapshot_object_info(self.sample_object_info, "run2", self.store_dir)
+        self.assertEqual(new_objects, 0)
+        self.assertEqual(self.count_objects(), len(self.sample_object_info))
+        self.assertEqual(list_runs(self.store_dir), ["run1", "run2"])
+
+    def test_diff_reports_added_removed_and_changed(self):
+        """Test that class and input field changes are reported"""
+        old_manifest, _ = snapshot_object_info(self.sample_object_info, "run1", self.store_dir)
+
+        object_info = copy.deepcopy(self.sample_object_info)
+        del object_info["IPAdapterNoise"]
+        object_info["NewNode"] = {"input": {"required": {}}, "output": [], "category": "test"}
+        ksampler = object_info["KSampler"]["input"]
+        ksampler["required"]["steps"][1]["max"] = 500
+        del ksampler["required"]["denoise"]
+        ksampler.setdefault("optional", {})["noise_seed"] = ["INT", {"default": 0}]
+        object_info["KSampler"]["category"] = "sampling/legacy"
+        new_manifest, new_objects = snapshot_object_info(object_info, "run2", self.store_dir)
+        self.assertEqual(new_objects, 2)
+
+        diff = diff_manifests(old_manifest, new_manifest, self.store_dir)
+        self.assertEqual(diff["added"], ["NewNode"])
+        self.assertEqual(diff["removed"], ["IPAdapterNoise"])
+        self.assertEqual(list(diff["changed"]), ["KSampler"])
+        change = diff["changed"]["KSampler"]
+        self.assertEqual(change["inputs"]["added"], ["optional.noise_seed"])
+        self.assertEqual(change["inputs"]["removed"], ["required.denoise"])
+        self.assertEqual(change["inputs"]["changed"], ["required.steps"])
+        self.assertEqual(change["fields"], ["category"])
+
+    def test_cells_keep_their_own_manifest(self):
+        """Test that versions tested in one run do not overwrite each other"""
+        object_info = copy.deepcopy(self.sample_object_info)
+        object_info["IPAdapterNoise"]["input"]["required"]["strength"][1]["max"] = 2.0
+        snapshot_object_info(self.sample_object_info, "run1", self.store_dir, cell="comfyui_ipadapter_plus@1.0.0+cpu")
+        snapshot_object_info(object_info, "run1", self.store_dir, cell="comfyui_ipadapter_plus@latest+cpu")
+        snapshot_object_info(object_info, "run2", self.store_dir, cell="comfyui_ipadapter_plus@latest+cpu")
+        self.assertEqual(list_runs(self.store_dir), ["run1", "run2"])
+        self.assertEqual(list_cells("run1", self.store_dir), ["comfyui_ipadapter_plus@1.0.0+cpu", "comfyui_ipadapter_plus@latest+cpu"])
+
+        pairs = pair_snapshots(
+            load_snapshot("run1/comfyui_ipadapter_plus@1.0.0+cpu", self.store_dir),
+            load_snapshot("run1/comfyui_ipadapter_plus@latest+cpu", self.store_dir)
+        )
+        self.assertEqual(len(pairs), 1)
+        diff = diff_manifests(pairs[0][1], pairs[0][2], self.store_dir)
+        self.assertEqual(diff["changed"]["IPAdapterNoise"]["inputs"]["changed"], ["required.strength"])
+
+        # Runs are compared cell by cell
+        pairs = pair_snapshots(load_snapshot("run1", self.store_dir), load_snapshot("run2", self.store_dir))
+        self.assertEqual([label for label, _, _ in pairs], ["comfyui_ipadapter_plus@latest+cpu", "core/comfyui"])
+        self.assertEqual(diff_manifests(pairs[0][1], pairs[0][2], self.store_dir)["changed"], {})
+
+    def test_core_classes_are_stored_once_per_checkout(self):
+        """Test that cell manifests only keep the node's classes and patched core classes"""
+        cell = "comfyui_ipadapter_plus@latest+cpu"
+        manifest, _ = snapshot_object_info(self.sample_object_info, "run1", self.store_dir, cell=cell)
+        self.assertIn("IPAdapterNoise", manifest["node_classes"])
+        self.assertNotIn("KSampler", manifest["node_classes"])
+        core_manifest = load_manifest("run1", self.store_dir, "core/comfyui")
+        self.assertIn("KSampler", core_manifest["node_classes"])
+        self.assertNotIn("IPAdapterNoise", core_manifest["node_classes"])
+
+        patched = copy.deepcopy(self.sample_object_info)
+        patched["KSampler"]["category"] = "patched"
+        manifest, _ = snapshot_object_info(patched, "run1", self.store_dir, cell="other_node@latest+cpu")
+        self.assertIn("KSampler", manifest["node_classes"])
+        self.assertEqual(load_manifest("run1", self.store_dir, "core/comfyui"), core_manifest)
+
+        # A cell tested on another ComfyUI commit is diffed including ComfyUI's classes
+        snapshot_object_info(patched, "run1", self.store_dir, cell=f"{cell}_c0ffee", core_id="c0ffee")
+        pairs = pair_snapshots(load_snapshot(f"run1/{cell}", self.store_dir), load_snapshot(f"run1/{cell}_c0ffee", self.store_dir))
+        self.assertEqual(list(diff_manifests(pairs[0][1], pairs[0][2], self.store_dir)["changed"]), ["KSampler"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import shutil
+import tempfile
+from start import run_stage, venv_fingerprint, get_python_path
+
+class TestSetupStages(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.comfy_dir = self.tmp_dir.name
+        self.manifest = {}
+        self.timings = []
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def action(self, success=True):
+        def run():
+            self.calls.append(success)
+            return success
+        return run
+
+    def make_venv(self, version="3.12.3"):
+        python_path = get_python_path(self.comfy_dir)
+        os.makedirs(os.path.dirname(python_path), exist_ok=True)
+        open(python_path, "w").close()
+        with open(os.path.join(self.comfy_dir, ".venv", "pyvenv.cfg"), "w") as f:
+            f.write(f"home = /usr/bin\nimplementation = CPython\nversion_info = {version}\n")
+
+    def test_skip_and_force(self):
+        """Test that a matching fingerprint skips the stage unless forced"""
+        fingerprint = {"lockfile": "abc"}
+        self.assertTrue(run_stage("deps", lambda: fingerprint, self.action(), self.manifest, self.timings))
+        self.assertTrue(run_stage("deps", lambda: fingerprint, self.action(), self.manifest, self.timings))
+        self.assertEqual(self.calls, [True])
+        self.assertEqual([status for _, status, _ in self.timings], ["done", "skipped"])
+
+        run_stage("deps", lambda: fingerprint, self.action(), self.manifest, self.timings, force=True)
+        run_stage("deps", lambda: {"lockfile": "def"}, self.action(), self.manifest, self.timings)
+        self.assertEqual(self.calls, [True, True, True])
+
+    def test_failed_or_invalid_stage_is_not_recorded(self):
+        """Test that failures and None fingerprints make the stage run again"""
+        self.assertFalse(run_stage("clone", lambda: {"branch": "x"}, self.action(False), self.manifest, self.timings))
+        self.assertNotIn("clone", self.manifest)
+
+        run_stage("clone", lambda: None, self.action(), self.manifest, self.timings)
+        run_stage("clone", lambda: None, self.action(), self.manifest, self.timings)
+        self.assertNotIn("clone", self.manifest)
+        self.assertEqual(self.calls, [False, True, True])
+
+    def test_venv_fingerprint_survives_recreation(self):
+        """Test that main.py recreating .venv does not invalidate the setup"""
+        self.assertIsNone(venv_fingerprint(self.comfy_dir))
+        self.make_venv()
+        fingerprint = venv_fingerprint(self.comfy_dir)
+        self.assertEqual(fingerprint["python_version"], "3.12.3")
+
+        shutil.rmtree(os.path.join(self.comfy_dir, ".venv"))
+        self.make_venv()
+        self.assertEqual(venv_fingerprint(self.comfy_dir), fingerprint)
+        self.make_venv("3.13.1")
+        self.assertNotEqual(venv_fingerprint(self.comfy_dir), fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()